@@ -0,0 +1,48 @@
+# Measure what a sitemap full of downloads costs the crawl: the fixture lists --assets
+# PDF files next to the pages, and the crawl should skip them without reading their
+# bodies, with the HEAD check and with only the streamed GET's header check
+#
+#   python benchmarks/bench_assets.py --pages 200 --assets 50 --asset-mb 20
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import itk_site_viz
+import itk_site_viz.fetch
+from fixture_server import build_site, start_fixture_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl a local fixture site that lists large downloads')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--assets', type=int, default=50)
+    parser.add_argument('--asset-mb', type=float, default=20.0, help='size of each download')
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    site = build_site(args.pages)
+    head_extensions = itk_site_viz.fetch.HEAD_EXTENSIONS
+    for label, extensions in (('HEAD check', head_extensions), ('GET only', ())):
+        itk_site_viz.fetch.HEAD_EXTENSIONS = extensions
+        server, base_url = start_fixture_server(site, assets=args.assets,
+                                                asset_size=int(args.asset_mb * 1024 * 1024))
+        urls = [base_url + path for path in site]
+        urls += [f'{base_url}/files/document-{i}.pdf' for i in range(args.assets)]
+        try:
+            start = time.perf_counter()
+            links_by_url = itk_site_viz.crawl_pages(urls, max_workers=args.workers, max_per_host=args.workers)
+            elapsed = time.perf_counter() - start
+            print(f'{label:<10} pages={len(links_by_url)}/{len(urls)} {elapsed:.2f}s '
+                  f'server sent {server.stats["bytes_sent"] / 1e6:.1f} MB')
+        finally:
+            server.shutdown()
+    itk_site_viz.fetch.HEAD_EXTENSIONS = head_extensions
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# Measure crawl throughput (pages/sec) against the local fixture server
+#
+#   python benchmarks/bench_crawl.py --pages 500 --latency 0.05 --workers 1 4 16 32
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import itk_site_viz
+from fixture_server import build_site, start_fixture_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl throughput against a local fixture site')
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--links-per-page', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16, 32])
+    parser.add_argument('--per-host', type=int, default=None, help='defaults to the worker count')
+    args = parser.parse_args()
+
+    site = build_site(args.pages, args.links_per_page)
+    server, base_url = start_fixture_server(site, latency=args.latency)
+    urls = [base_url + path for path in site]
+    try:
+        for workers in args.workers:
+            start = time.perf_counter()
+            dependencies, _ = itk_site_viz.build_dependency_map(
+                urls, max_workers=workers, max_per_host=args.per_host or workers)
+            elapsed = time.perf_counter() - start
+            edges = sum(len(refs) for refs in dependencies.values())
+            print(f'workers={workers:<3} pages={len(urls)} edges={edges} '
+                  f'{elapsed:.2f}s {len(urls) / elapsed:.1f} pages/sec')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Compare the streaming lxml link extractor with the old BeautifulSoup tree path
+#
+#   python benchmarks/bench_extract.py                      # synthetic fixtures
+#   python benchmarks/bench_extract.py --fixtures saved/    # a directory of saved *.html pages
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import itk_site_viz
+from fixture_server import build_site, render_page
+
+
+# The extraction scrape_page used before the streaming extractor
+def bs4_links(body):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(body, 'lxml')
+    links = []
+    for p in soup.find_all('p', class_='link link-arrow'):
+        a_tag = p.find('a')
+        if a_tag and a_tag.get('href'):
+            links.append(a_tag['href'])
+    return links
+
+
+# Feed the body in network-sized chunks, as scrape_page does while downloading
+def streamed_links(body):
+    extractor = itk_site_viz.LinkExtractor()
+    for offset in range(0, len(body), itk_site_viz.CHUNK_SIZE):
+        extractor.feed(body[offset:offset + itk_site_viz.CHUNK_SIZE])
+    return extractor.close()
+
+
+def load_fixtures(directory, pages, filler):
+    if directory:
+        bodies = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+            with open(path, 'rb') as file:
+                bodies.append(file.read())
+        return bodies
+    site = build_site(pages)
+    return [render_page('https://www.itk-engineering.de', path, links, filler).encode('utf-8')
+            for path, links in site.items()]
+
+
+def bench(name, extract, bodies, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for body in bodies:
+            extract(body)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    megabytes = sum(len(body) for body in bodies) / 1024 / 1024
+    print(f'{name:<12} {best:.3f}s  {len(bodies) / best:8.1f} pages/sec  {megabytes / best:6.1f} MB/s')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Link extraction benchmark')
+    parser.add_argument('--fixtures', help='directory of saved *.html pages')
+    parser.add_argument('--pages', type=int, default=200, help='synthetic pages when --fixtures is not given')
+    parser.add_argument('--filler', type=int, default=150, help='markup blocks per synthetic page')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    bodies = load_fixtures(args.fixtures, args.pages, args.filler)
+    if not bodies:
+        parser.error('no fixtures found')
+    mismatches = sum(bs4_links(body) != itk_site_viz.extract_links(body) for body in bodies)
+    print(f'{len(bodies)} pages, {sum(map(len, bodies)) / len(bodies) / 1024:.0f} KB average, '
+          f'{mismatches} pages where the extractors disagree')
+
+    baseline = bench('bs4', bs4_links, bodies, args.rounds)
+    fast = bench('lxml-target', itk_site_viz.extract_links, bodies, args.rounds)
+    bench('streamed', streamed_links, bodies, args.rounds)
+    print(f'speedup: {baseline / fast:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
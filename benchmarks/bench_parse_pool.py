@@ -0,0 +1,44 @@
+# Measure how the process-pool parsing stage scales with core count
+#
+#   python benchmarks/bench_parse_pool.py --pages 500 --filler 300 --parse-workers 0 1 2 4 8
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import itk_site_viz
+from fixture_server import build_site, start_fixture_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process-pool parsing throughput against a local fixture site')
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--filler', type=int, default=300, help='markup blocks per page, sets the parse cost')
+    parser.add_argument('--workers', type=int, default=16, help='fetcher threads')
+    parser.add_argument('--parse-workers', type=int, nargs='+',
+                        default=sorted({0, 1, 2, os.cpu_count() or 1}),
+                        help='parser processes; 0 parses inside the fetcher threads')
+    args = parser.parse_args()
+
+    site = build_site(args.pages)
+    server, base_url = start_fixture_server(site, filler=args.filler)
+    urls = [base_url + path for path in site]
+    itk_site_viz.build_dependency_map(urls, max_workers=args.workers)  # Warm the server's render cache
+    print(f'{os.cpu_count()} cores')
+    try:
+        for parse_workers in args.parse_workers:
+            start = time.perf_counter()
+            dependencies, _ = itk_site_viz.build_dependency_map(
+                urls, max_workers=args.workers, max_per_host=args.workers, parse_workers=parse_workers)
+            elapsed = time.perf_counter() - start
+            edges = sum(len(refs) for refs in dependencies.values())
+            print(f'parse_workers={parse_workers:<3} edges={edges} {elapsed:.2f}s '
+                  f'{len(urls) / elapsed:.1f} pages/sec')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
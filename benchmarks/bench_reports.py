@@ -0,0 +1,92 @@
+# Report generation time and peak memory at increasing site sizes, plus the memory
+# held by the LinkGraph compared with the old dependency dicts
+#
+#   python benchmarks/bench_reports.py --pages 1000 10000 100000
+#   python benchmarks/bench_reports.py --pages 200000        (1M links, for the analytics)
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import itk_site_viz
+from fixture_server import build_site
+
+
+# Function to build the report inputs for a synthetic site
+def synthetic_graph(pages, links_per_page):
+    base_url = 'https://www.itk-engineering.de'
+    site = build_site(pages, links_per_page)
+    urls = [base_url + path for path in site]
+    links_by_url = {base_url + path: [base_url + link for link in links] for path, links in site.items()}
+    return urls, links_by_url
+
+
+# Function to measure memory retained by whatever build() returns
+def retained(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def measure(name, pages, render):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = render()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{pages:>7} pages  {name:<12} {elapsed:7.2f}s  peak {peak / 1024 / 1024:7.1f} MB  '
+          f'output {size / 1024 / 1024:7.1f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report writer benchmark')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--links-per-page', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in args.pages:
+            urls, links_by_url = synthetic_graph(pages, args.links_per_page)
+            graph, graph_size = retained(lambda: itk_site_viz.LinkGraph.from_links(urls, links_by_url))
+            _, maps_size = retained(graph.to_dependency_maps)
+            print(f'{pages:>7} pages  graph memory: LinkGraph {graph_size / 1024 / 1024:.1f} MB, '
+                  f'dependency dicts {maps_size / 1024 / 1024:.1f} MB')
+            hierarchy = itk_site_viz.build_hierarchy(urls, graph)
+            path = os.path.join(directory, 'report.html')
+
+            def dependency_report():
+                with open(path, 'w', encoding='utf-8') as file:
+                    itk_site_viz.write_dependency_html(file, graph)
+                return os.path.getsize(path)
+
+            def hierarchy_report():
+                with open(path, 'w', encoding='utf-8') as file:
+                    itk_site_viz.write_hierarchy_html(file, hierarchy, graph)
+                return os.path.getsize(path)
+
+            def mesh_report():
+                positions = itk_site_viz.layout_graph(graph, hierarchy)
+                with open(path, 'w', encoding='utf-8') as file:
+                    itk_site_viz.write_mesh_data(file, graph, positions)
+                return os.path.getsize(path)
+
+            def analytics():
+                report = os.path.join(directory, 'analytics.json')
+                itk_site_viz.write_analytics(report, graph, itk_site_viz.analyze_graph(graph))
+                return os.path.getsize(report)
+
+            measure('analytics', pages, analytics)
+            measure('dependencies', pages, dependency_report)
+            measure('hierarchy', pages, hierarchy_report)
+            measure('mesh+layout', pages, mesh_report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# Measure how the crawl scheduler copes with a host that throttles: the fixture answers
+# 429 to page requests beyond --capacity at once, and the scheduler has to find that
+# limit instead of hammering the host with every worker
+#
+#   python benchmarks/bench_scheduler.py --pages 500 --capacity 4 --workers 16 32
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import itk_site_viz
+from fixture_server import build_site, start_fixture_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl against a local fixture site that throttles')
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--capacity', type=int, default=4, help='requests the server takes at once')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After of the 429 answers')
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 16, 32])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    site = build_site(args.pages)
+    for workers in args.workers:
+        server, base_url = start_fixture_server(site, latency=args.latency, max_in_flight=args.capacity,
+                                                retry_after=args.retry_after)
+        urls = [base_url + path for path in site]
+        try:
+            scheduler = itk_site_viz.CrawlScheduler(max_per_host=workers)
+            start = time.perf_counter()
+            links_by_url = itk_site_viz.crawl_pages(urls, max_workers=workers, max_per_host=workers,
+                                                    scheduler=scheduler)
+            elapsed = time.perf_counter() - start
+            host = next(iter(scheduler.hosts.values()))
+            print(f'workers={workers:<3} pages={len(links_by_url)}/{len(urls)} {elapsed:.2f}s '
+                  f'{len(urls) / elapsed:.1f} pages/sec, 429s={server.stats["throttled"]} '
+                  f'limit={host.limit:.1f}')
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
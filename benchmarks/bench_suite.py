@@ -0,0 +1,224 @@
+# End-to-end pipeline benchmark: sitemap, crawl, graph and every report, per scenario,
+# against a fixture site served from a separate process. Results are written as JSON
+# so runs can be compared.
+#
+#   python benchmarks/bench_suite.py --scenarios 1k 10k --output bench_results.json
+#   python benchmarks/bench_suite.py --scenarios 1k --compare bench_results.json
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import itk_site_viz
+import itk_site_viz.fetch
+from fixture_server import start_fixture_process
+
+# Site size, server behaviour and crawl settings of each scenario
+SCENARIOS = {
+    '1k': {'pages': 1000, 'links_per_page': 5, 'latency': 0.02, 'jitter': 0.03, 'error_rate': 0.01,
+           'broken_rate': 0.005, 'filler': 50, 'workers': 16},
+    '10k': {'pages': 10000, 'links_per_page': 5, 'latency': 0.005, 'jitter': 0.01, 'error_rate': 0.01,
+            'broken_rate': 0.005, 'filler': 50, 'workers': 32},
+    '100k': {'pages': 100000, 'links_per_page': 5, 'latency': 0.0, 'jitter': 0.002, 'error_rate': 0.005,
+             'broken_rate': 0.001, 'filler': 20, 'workers': 32},
+}
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+# Function to read this process's resident set size in bytes
+def current_rss():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Peak, not current, off Linux
+
+
+# Times one pipeline stage and samples RSS while it runs. Stages using a process pool
+# only count the parent process.
+class Stage:
+    def __init__(self, results, name, interval=0.005):
+        self.results = results
+        self.name = name
+        self.interval = interval
+        self.extra = {}
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.rss_start = self.peak = current_rss()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+        self.sampler.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.stopped.set()
+        self.sampler.join()
+        self.peak = max(self.peak, current_rss())
+        self.results[self.name] = {
+            'seconds': round(elapsed, 4),
+            'rss_start_mb': round(self.rss_start / 2 ** 20, 1),
+            'peak_rss_mb': round(self.peak / 2 ** 20, 1),
+            **self.extra,
+        }
+        print(f'  {self.name:<18} {elapsed:8.2f}s  peak RSS {self.peak / 2 ** 20:7.1f} MB')
+
+
+# LinkExtractor that adds up the CPU time spent parsing, across all fetcher threads
+class TimedLinkExtractor(itk_site_viz.LinkExtractor):
+    seconds = 0.0
+    lock = threading.Lock()
+
+    def _timed(self, method, *args):
+        start = time.thread_time()  # CPU time, so waiting for the GIL is not counted
+        try:
+            return method(*args)
+        finally:
+            elapsed = time.thread_time() - start
+            with TimedLinkExtractor.lock:
+                TimedLinkExtractor.seconds += elapsed
+
+    def feed(self, chunk):
+        return self._timed(super().feed, chunk)
+
+    def close(self):
+        return self._timed(super().close)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_scenario(name, config, directory):
+    print(f'scenario {name}: {config}')
+    server_options = {key: config[key] for key in ('latency', 'jitter', 'error_rate', 'broken_rate', 'filler')}
+    process, base_url = start_fixture_process(config['pages'], config['links_per_page'], **server_options)
+    stages = {}
+    try:
+        with Stage(stages, 'sitemap') as stage:
+            entries = itk_site_viz.parse_sitemap_entries(base_url + '/sitemap.xml')
+            stage.extra['entries'] = len(entries)
+
+        # The crawl's own retry setup: throttling answers are left to the scheduler
+        session = itk_site_viz.create_session(pool_size=config['workers'],
+                                              retry_statuses=itk_site_viz.CRAWL_RETRY_STATUSES)
+        metrics = itk_site_viz.RunMetrics()  # Per-page fetch times, body included
+        TimedLinkExtractor.seconds = 0.0
+        itk_site_viz.fetch.LinkExtractor = TimedLinkExtractor  # The name fetch_page looks up
+        urls = [entry.loc for entry in entries]
+        with Stage(stages, 'crawl') as stage:
+            links_by_url = itk_site_viz.crawl_pages(urls, max_workers=config['workers'],
+                                                    max_per_host=config['workers'], session=session,
+                                                    metrics=metrics)
+        elapsed = stages['crawl']['seconds']
+        latencies = [fetch_seconds for _, _, _, fetch_seconds, _ in metrics.pages]
+        stages['crawl'].update({
+            'pages': len(urls),
+            'failed': len(urls) - len(links_by_url),
+            'pages_per_sec': round(len(urls) / elapsed, 1) if elapsed else None,
+            'fetch_p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            'fetch_p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            'parse_seconds': round(TimedLinkExtractor.seconds, 4),
+        })
+
+        # Reports are rendered for the live site's URLs so their shape matches production
+        def live(url):
+            return itk_site_viz.BASE_URL + url[len(base_url):]
+        urls = [live(url) for url in urls]
+        links_by_url = {live(url): [live(link) for link in links] for url, links in links_by_url.items()}
+
+        with Stage(stages, 'graph') as stage:
+            graph = itk_site_viz.LinkGraph.from_links(urls, links_by_url)
+            stage.extra['edges'] = graph.num_edges
+        with Stage(stages, 'hierarchy'):
+            hierarchy = itk_site_viz.build_hierarchy(urls, graph)
+        with Stage(stages, 'dependency_report'):
+            dependency_files = itk_site_viz.generate_dependency_html(
+                graph, os.path.join(directory, 'all_dependencies.html'), shard_by='prefix')
+        with Stage(stages, 'hierarchy_report'):
+            with open(os.path.join(directory, 'website_hierarchy_graph.html'), 'w', encoding='utf-8') as file:
+                itk_site_viz.write_hierarchy_html(file, hierarchy, graph, dependency_files=dependency_files)
+        with Stage(stages, 'mesh_report'):
+            itk_site_viz.generate_mesh_dependency_html_with_search(
+                graph, os.path.join(directory, 'itk-engineering-graph.html'), hierarchy)
+    finally:
+        itk_site_viz.fetch.LinkExtractor = TimedLinkExtractor.__bases__[0]
+        process.terminate()
+        process.join()
+
+    return {'config': config, 'stages': stages}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Function to print how each stage's time and memory moved against an earlier run
+def compare(previous, current):
+    for name, scenario in current['scenarios'].items():
+        before = previous.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        print(f'scenario {name} vs {previous.get("revision") or "previous run"}:')
+        for stage, result in scenario['stages'].items():
+            old = before['stages'].get(stage)
+            if not old:
+                continue
+            ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+            print(f'  {stage:<18} {old["seconds"]:8.2f}s -> {result["seconds"]:8.2f}s ({ratio:5.2f}x)  '
+                  f'peak RSS {old["peak_rss_mb"]:7.1f} -> {result["peak_rss_mb"]:7.1f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark against a local fixture site')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=['1k'])
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    results = {
+        'revision': git_revision(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'scenarios': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.scenarios:
+            results['scenarios'][name] = run_scenario(name, SCENARIOS[name], directory)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            previous = json.load(file)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    print(f'results written to {args.output}')
+    if previous:
+        compare(previous, results)
+
+
+if __name__ == '__main__':
+    main()
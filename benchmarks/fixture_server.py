@@ -0,0 +1,198 @@
+# Local stand-in for the live site, so crawls can be measured on one machine
+import hashlib
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FixtureHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # The default backlog of 5 drops connections under a wide crawl
+
+    def handle_error(self, request, client_address):
+        # Crawlers hang up on bodies they do not want; that is not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+# Function to build a synthetic site: {path: [linked paths]}
+def build_site(pages=1000, links_per_page=5, seed=0):
+    rng = random.Random(seed)
+    paths = ['/'] + [f'/section-{i % 20}/page-{i}/' for i in range(1, pages)]
+    return {path: rng.sample(paths, min(links_per_page, len(paths))) for path in paths}
+
+
+# Function to render one synthetic page using the same markup as the live site.
+# filler adds that many blocks of navigation/body markup to reach realistic page sizes.
+def render_page(base_url, path, links, filler=0):
+    items = ''.join(
+        f'<p class="link link-arrow"><a href="{base_url}{link}">Read more</a></p>\n'
+        for link in links
+    )
+    blocks = ''.join(
+        f'<div class="teaser teaser-{i}"><ul class="nav"><li><a href="/nav/{i}/">Navigation {i}</a></li>'
+        f'<li><a href="/nav/{i}/sub/">Sub navigation</a></li></ul>'
+        f'<p class="text">Engineering services for automotive, rail and health, paragraph {i}. '
+        f'<span>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</span></p></div>\n'
+        for i in range(filler)
+    )
+    return (f'<html><head><title>{path}</title></head><body>\n'
+            f'<h1>{path}</h1>\n{blocks}{items}</body></html>\n')
+
+
+# Function to render a sitemap for the synthetic site, listing assets after the pages
+def render_sitemap(base_url, site, assets=()):
+    entries = ''.join(
+        f'<url>\n<loc>{base_url}{path}</loc>\n'
+        f'<lastmod>2024-09-12T09:55:55+00:00</lastmod>\n<priority>0.80</priority>\n</url>\n'
+        for path in [*site, *assets]
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            f'{entries}</urlset>\n')
+
+
+# Function to start the fixture server in a background thread, returns (server, base_url).
+# Every response waits latency plus up to jitter seconds. error_rate of the pages answer
+# their first request with error_status and are fine afterwards (a retry succeeds);
+# broken_rate of the pages always answer 404. Which pages fail is fixed by seed.
+# robots is served as /robots.txt (404 when None). With max_in_flight, page requests
+# beyond that many at once answer 429 with a Retry-After of retry_after seconds.
+# The sitemap also lists assets PDF files of asset_size bytes each, which answer HEAD
+# requests too. server.stats counts the page requests, the 429s, the peak concurrency
+# and the body bytes written.
+def start_fixture_server(site, latency=0.0, host='127.0.0.1', port=0, filler=0, jitter=0.0, error_rate=0.0,
+                         error_status=503, broken_rate=0.0, seed=0, robots=None, max_in_flight=None,
+                         retry_after=1, assets=0, asset_size=1024 * 1024):
+    rendered = {}  # Pages are rendered once so serving stays cheap next to the crawler
+    rng = random.Random(seed)
+    flaky = {path for path in site if rng.random() < error_rate}
+    broken = {path for path in site if rng.random() < broken_rate}
+    lock = threading.Lock()
+    stats = {'requests': 0, 'throttled': 0, 'in_flight': 0, 'peak_in_flight': 0, 'bytes_sent': 0}
+    asset_paths = [f'/files/document-{i}.pdf' for i in range(assets)]
+    asset_chunk = b'%PDF-1.4\n' + b'0' * 65527
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; with Nagle on, every keep-alive
+        # request would wait for the client's delayed ACK (about 40 ms)
+        disable_nagle_algorithm = True
+
+        def do_HEAD(self):
+            if self.path not in asset_paths:
+                self.send_error(405)
+                return
+            self._asset_headers()
+
+        def _asset_headers(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('Content-Length', str(asset_size))
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path in site:
+                with lock:
+                    stats['requests'] += 1
+                    overloaded = max_in_flight is not None and stats['in_flight'] >= max_in_flight
+                    if overloaded:
+                        stats['throttled'] += 1
+                    else:
+                        stats['in_flight'] += 1
+                        stats['peak_in_flight'] = max(stats['peak_in_flight'], stats['in_flight'])
+                if overloaded:
+                    self.send_response(429)
+                    self.send_header('Retry-After', str(retry_after))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                try:
+                    self._serve()
+                finally:
+                    with lock:
+                        stats['in_flight'] -= 1
+            else:
+                self._serve()
+
+        def _serve(self):
+            base_url = f'http://{self.headers.get("Host", host)}'
+            if self.path == '/sitemap.xml':
+                body, content_type = render_sitemap(base_url, site, asset_paths), 'application/xml'
+            elif self.path in asset_paths:
+                self._asset_headers()
+                try:
+                    for offset in range(0, asset_size, len(asset_chunk)):
+                        data = asset_chunk[:asset_size - offset]
+                        self.wfile.write(data)
+                        with lock:
+                            stats['bytes_sent'] += len(data)
+                except OSError:
+                    self.close_connection = True  # The client hung up without reading the rest
+                return
+            elif self.path == '/robots.txt' and robots is not None:
+                body, content_type = robots, 'text/plain'
+            elif self.path in broken:
+                self.send_error(404)
+                return
+            elif self.path in site:
+                with lock:
+                    failing = self.path in flaky
+                    flaky.discard(self.path)
+                if failing:
+                    self.send_error(error_status)
+                    return
+                if self.path not in rendered:
+                    rendered[self.path] = render_page(base_url, self.path, site[self.path], filler)
+                body, content_type = rendered[self.path], 'text/html; charset=utf-8'
+            else:
+                self.send_error(404)
+                return
+            if latency or jitter:
+                time.sleep(latency + random.uniform(0, jitter))
+            data = body.encode('utf-8')
+            etag = '"%s"' % hashlib.md5(data).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            with lock:
+                stats['bytes_sent'] += len(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = FixtureHTTPServer((host, port), Handler)
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def _serve_in_process(connection, pages, links_per_page, seed, options):
+    _, base_url = start_fixture_server(build_site(pages, links_per_page, seed), seed=seed, **options)
+    connection.send(base_url)
+    connection.close()
+    threading.Event().wait()  # The server thread does the work until the process is terminated
+
+
+# Function to serve a synthetic site from a separate process, so the server's CPU time
+# and memory stay out of the crawler's measurements. Returns (process, base_url); the
+# caller terminates the process. options are passed on to start_fixture_server.
+def start_fixture_process(pages=1000, links_per_page=5, seed=0, **options):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve_in_process, args=(child, pages, links_per_page, seed, options),
+                                      daemon=True)
+    process.start()
+    base_url = parent.recv()
+    return process, base_url
@@ -0,0 +1,52 @@
+# Sitemap crawler and site visualizer: crawls the pages listed in a sitemap into a link
+# graph and renders the hierarchy, dependency and mesh reports from it.
+#
+# Everything below is re-exported lazily (PEP 562): importing the package loads only the
+# settings, and a name's module, with its requests / lxml / numpy imports, is loaded the
+# first time the name is used. Report rendering therefore never pulls in the crawler.
+import importlib
+
+from .settings import *  # noqa: F401,F403
+
+_EXPORTS = {
+    'sitemap': ('SitemapEntry', 'SITEMAP_NS', 'open_sitemap', 'iter_sitemap', 'parse_sitemap_entries',
+                'parse_sitemap', 'parse_lastmod'),
+    'hierarchy': ('PathTrieNode', 'build_hierarchy'),
+    'session': ('create_session', 'get_session'),
+    'cache': ('ResponseCache',),
+    'store': ('CrawlStore',),
+    'metrics': ('RunMetrics',),
+    'links': ('LinkSelector', 'parse_link_selector', 'LINK_SELECTORS', 'LinkExtractor', 'extract_links',
+              'content_charset'),
+    'urls': ('resolve_links', 'canonical_url', 'page_url', 'uses_trailing_slash'),
+    'dedup': ('normalize_markup', 'page_simhash', 'DuplicateIndex'),
+    'fetch': ('FetchResult', 'fetch_page', 'fetch_page_deduplicated', 'scrape_page'),
+    'scheduler': ('TokenBucket', 'retry_after', 'HostState', 'CrawlScheduler'),
+    'crawl': ('crawl_pages', 'build_link_graph', 'build_dependency_map', 'needs_rescrape', 'crawl_pages_incremental',
+              'build_link_graph_incremental', 'build_dependency_map_incremental', 'BloomFilter', 'crawl_frontier',
+              'build_link_graph_frontier'),
+    'graph': ('GRAPH_TYPECODE', 'LinkGraph', 'link_maps'),
+    'reports': ('dependency_anchor', 'write_dependency_html', 'plan_dependency_shards', 'write_dependency_index',
+                'generate_dependency_html', 'write_hierarchy_html', 'hierarchy_to_html_graph'),
+    'analytics': ('GraphAnalytics', 'home_page', 'pagerank', 'click_depth', 'strongly_connected_components',
+                  'broken_links', 'analyze_graph', 'degree_distribution', 'analytics_report', 'write_analytics',
+                  'rank_sizes', 'NODE_PALETTE', 'node_groups'),
+    'diff': ('CrawlDiff', 'diff_runs', 'diff_sitemaps', 'diff_report', 'write_diff_html', 'generate_diff_report'),
+    'mesh': ('radial_layout', 'force_layout', 'layout_graph', 'search_tokens', 'build_search_index',
+             'write_mesh_data', 'write_mesh_html', 'generate_mesh_dependency_html_with_search'),
+    'pipeline': ('crawl_site', 'render_reports', 'write_run_reports', 'generate_html_graph'),
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = [name for names in _EXPORTS.values() for name in names]
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
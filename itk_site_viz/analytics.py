@@ -0,0 +1,235 @@
+# Link graph analytics: degrees, orphan pages, PageRank, strongly connected components,
+# click depth and broken links, computed with NumPy over the LinkGraph CSR arrays
+from collections import namedtuple
+import json
+import logging
+
+import numpy as np
+
+from .graph import GRAPH_TYPECODE
+from .settings import (BASE_URL, BROKEN_COLOR, DEPTH_COLORS, PAGERANK_DAMPING, PAGERANK_MAX_ITERATIONS,
+                       PAGERANK_TOLERANCE, UNREACHABLE_COLOR)
+
+log = logging.getLogger(__name__)
+
+# Analytics of one LinkGraph; the arrays are indexed by page id. root is the page click
+# depth is measured from (None for an empty graph), depth is -1 for pages it cannot reach,
+# component numbers the strongly connected components from 0 by decreasing size, failed
+# marks the pages that could not be fetched and broken_links holds the (source, target)
+# id pairs of links to them.
+GraphAnalytics = namedtuple('GraphAnalytics', ['root', 'in_degree', 'out_degree', 'orphans', 'pagerank',
+                                               'component', 'depth', 'failed', 'broken_links'])
+
+# Function to view a CSR offsets / indices pair as NumPy arrays
+def _csr(offsets, indices):
+    return (np.frombuffer(offsets, dtype=GRAPH_TYPECODE).astype(np.intp),
+            np.frombuffer(indices, dtype=GRAPH_TYPECODE).astype(np.intp))
+
+# Function to gather the CSR rows of nodes into one array, without a Python loop
+def _gather(offsets, indices, nodes):
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    # Position k of the result reads indices[k + shift], shift being constant per row
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return indices[np.arange(len(shift)) + shift]
+
+# Function to pick the page click depth is measured from: the home page of base_url,
+# else the first sitemap page
+def home_page(graph, base_url=BASE_URL):
+    for url in (base_url + '/', base_url):
+        if url in graph.ids:
+            return graph.ids[url]
+    return 0 if len(graph) else None
+
+# Function to compute PageRank by power iteration. Pages without outbound links spread
+# their rank evenly over all pages, so the ranks always sum to 1.
+def pagerank(graph, damping=PAGERANK_DAMPING, tolerance=PAGERANK_TOLERANCE, max_iterations=PAGERANK_MAX_ITERATIONS):
+    n = len(graph)
+    if n == 0:
+        return np.zeros(0)
+    offsets, targets = _csr(graph.out_offsets, graph.out_targets)
+    out_degree = np.diff(offsets)
+    sources = np.repeat(np.arange(n), out_degree)
+    dangling = out_degree == 0
+    share = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        flow = np.bincount(targets, weights=(rank * share)[sources], minlength=n)
+        updated = damping * (flow + rank[dangling].sum() / n) + (1 - damping) / n
+        change = np.abs(updated - rank).sum()
+        rank = updated
+        if change < tolerance:
+            break
+    return rank
+
+# Function to compute the click depth of every page from root by breadth-first search,
+# one vectorized step per level; -1 marks pages root cannot reach
+def click_depth(graph, root):
+    depth = np.full(len(graph), -1, dtype=np.int32)
+    if root is None:
+        return depth
+    offsets, targets = _csr(graph.out_offsets, graph.out_targets)
+    depth[root] = 0
+    frontier = np.array([root], dtype=np.intp)
+    level = 0
+    while len(frontier):
+        level += 1
+        reached = _gather(offsets, targets, frontier)
+        frontier = np.unique(reached[depth[reached] < 0])
+        depth[frontier] = level
+    return depth
+
+# Function to label the strongly connected components with Tarjan's algorithm, iterative
+# so deep link chains cannot overflow the stack. Components are numbered from 0 by
+# decreasing size.
+def strongly_connected_components(graph):
+    n = len(graph)
+    offsets = graph.out_offsets.tolist()
+    targets = graph.out_targets.tolist()
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    labels = [0] * n
+    stack = []
+    counter = count = 0
+    for start in range(n):
+        if index[start] >= 0:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack[start] = True
+        path, cursors = [start], [offsets[start]]
+        while path:
+            node = path[-1]
+            k, end = cursors[-1], offsets[node + 1]
+            while k < end:
+                target = targets[k]
+                k += 1
+                if index[target] < 0:
+                    break
+                if on_stack[target] and index[target] < low[node]:
+                    low[node] = index[target]
+            else:
+                # Every link of node is done: close its component if it is the root of one
+                path.pop()
+                cursors.pop()
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        labels[member] = count
+                        if member == node:
+                            break
+                    count += 1
+                if path and low[node] < low[path[-1]]:
+                    low[path[-1]] = low[node]
+                continue
+            # Descend into target, resuming node's links at k afterwards
+            cursors[-1] = k
+            index[target] = low[target] = counter
+            counter += 1
+            stack.append(target)
+            on_stack[target] = True
+            path.append(target)
+            cursors.append(offsets[target])
+
+    labels = np.array(labels, dtype=np.intp)
+    order = np.argsort(-np.bincount(labels, minlength=count), kind='stable')
+    renumber = np.empty(count, dtype=np.intp)
+    renumber[order] = np.arange(count)
+    return renumber[labels]
+
+# Function to find the links pointing at pages that failed to load. Returns the failed
+# page mask and the (source, target) id pairs.
+def broken_links(graph, failed_urls=()):
+    failed = np.zeros(len(graph), dtype=bool)
+    failed[[graph.ids[url] for url in failed_urls if url in graph.ids]] = True
+    offsets, targets = _csr(graph.out_offsets, graph.out_targets)
+    sources = np.repeat(np.arange(len(graph)), np.diff(offsets))
+    mask = failed[targets]
+    return failed, np.column_stack((sources[mask], targets[mask]))
+
+# Function to run every analysis over a LinkGraph. failed_urls are the pages the crawl
+# could not fetch (CrawlStore.failures()); root defaults to home_page(graph, base_url).
+def analyze_graph(graph, failed_urls=(), root=None, base_url=BASE_URL):
+    root = root if root is not None else home_page(graph, base_url)
+    in_degree = np.diff(np.frombuffer(graph.in_offsets, dtype=GRAPH_TYPECODE))
+    out_degree = np.diff(np.frombuffer(graph.out_offsets, dtype=GRAPH_TYPECODE))
+    orphans = np.flatnonzero(in_degree == 0)
+    orphans = orphans[orphans != root]  # Nothing has to link to the home page
+    failed, broken = broken_links(graph, failed_urls)
+    return GraphAnalytics(root, in_degree, out_degree, orphans, pagerank(graph), strongly_connected_components(graph),
+                          click_depth(graph, root), failed, broken)
+
+# Function to summarize a degree sequence: mean, quantiles and a histogram over powers of
+# two ({"0": pages with no links, "1": ..., "2-3": ..., "4-7": ...})
+def degree_distribution(degrees):
+    if not len(degrees):
+        return {'mean': 0.0, 'median': 0, 'p90': 0, 'p99': 0, 'max': 0, 'histogram': {}}
+    buckets = np.bincount(np.where(degrees > 0, np.log2(np.maximum(degrees, 1)).astype(int) + 1, 0))
+    labels = ['0', '1'] + [f'{2 ** (b - 1)}-{2 ** b - 1}' for b in range(2, len(buckets))]
+    return {
+        'mean': round(float(degrees.mean()), 3),
+        'median': int(np.median(degrees)),
+        'p90': int(np.quantile(degrees, 0.9, method='lower')),
+        'p99': int(np.quantile(degrees, 0.99, method='lower')),
+        'max': int(degrees.max()),
+        'histogram': {label: int(count) for label, count in zip(labels, buckets) if count},
+    }
+
+# Function to turn the analytics into the JSON-ready report: the top pages by PageRank and
+# every orphan, unreachable page and broken link by URL
+def analytics_report(graph, analytics, top=20):
+    urls = graph.urls
+    depth = analytics.depth
+    components = np.bincount(analytics.component) if len(graph) else np.zeros(0, dtype=int)
+    reached = depth[depth >= 0]
+    best = np.argsort(-analytics.pagerank, kind='stable')[:top]
+    return {
+        'pages': len(graph),
+        'links': graph.num_edges,
+        'root': urls[analytics.root] if analytics.root is not None else None,
+        'in_degree': degree_distribution(analytics.in_degree),
+        'out_degree': degree_distribution(analytics.out_degree),
+        'orphans': [urls[i] for i in analytics.orphans],
+        'click_depth': {
+            'max': int(reached.max()) if len(reached) else None,
+            'histogram': {str(d): int(count) for d, count in enumerate(np.bincount(reached))},
+            'unreachable': [urls[i] for i in np.flatnonzero(depth < 0)],
+        },
+        'components': {
+            'count': len(components),
+            'largest': [int(size) for size in components[:top]],  # Labels are ordered by size
+            'singletons': int((components == 1).sum()),
+        },
+        'pagerank': [{'url': urls[i], 'score': round(float(analytics.pagerank[i]), 6)} for i in best],
+        'broken_links': [{'source': urls[s], 'target': urls[t]} for s, t in analytics.broken_links.tolist()],
+    }
+
+# Function to write the analytics report as JSON
+def write_analytics(path, graph, analytics):
+    report = analytics_report(graph, analytics)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    log.info("Graph analytics written to %s: %d orphan pages, %d unreachable, %d broken links",
+             path, len(report['orphans']), len(report['click_depth']['unreachable']), len(report['broken_links']))
+    return report
+
+# Function to scale PageRank into node sizes between low and high. The scale is
+# logarithmic, so the home page does not dwarf everything else.
+def rank_sizes(pagerank, low, high):
+    scaled = np.log1p(pagerank * len(pagerank))  # An average page scores log(2)
+    top = scaled.max() if len(scaled) else 0
+    return low + (high - low) * scaled / top if top else np.full(len(pagerank), float(low))
+
+# Colors of node_groups: one per click depth, then unreachable, then failed pages
+NODE_PALETTE = DEPTH_COLORS + (UNREACHABLE_COLOR, BROKEN_COLOR)
+
+# Function to give each page its index into NODE_PALETTE: failed pages first, then pages
+# the root cannot reach, then by click depth
+def node_groups(analytics):
+    groups = np.minimum(analytics.depth, len(DEPTH_COLORS) - 1)
+    groups[analytics.depth < 0] = len(DEPTH_COLORS)
+    groups[analytics.failed] = len(DEPTH_COLORS) + 1
+    return groups
@@ -0,0 +1,79 @@
+# Conditional-GET response cache kept between runs
+import json
+import logging
+import os
+import threading
+
+from .settings import CACHE_FILE
+
+log = logging.getLogger(__name__)
+
+# Conditional-GET response cache: remembers ETag / Last-Modified and the links
+# extracted from each URL, so an unchanged page costs a 304 instead of a download
+class ResponseCache:
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+
+    # Validators to send with the next request for this URL
+    def conditional_headers(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    # Called on a 304: count the hit and hand back the cached links
+    def hit(self, url):
+        with self.lock:
+            entry = self.entries[url]
+            self.hits += 1
+            self.bytes_saved += entry.get('size', 0)
+            return list(entry['links'])
+
+    # Called on a full 200 response; fingerprint is the page's duplicate-detection
+    # fingerprint, kept so a 304 can still place the page in its duplicate cluster
+    def store(self, url, headers, links, size, fingerprint=None):
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self.lock:
+            self.misses += 1
+            if etag or last_modified:
+                self.entries[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'size': size,
+                    'links': links,
+                }
+                if fingerprint is not None:
+                    self.entries[url]['fingerprint'] = list(fingerprint)
+            else:
+                self.entries.pop(url, None)
+
+    # Fingerprint stored with the cached page, or None
+    def fingerprint(self, url):
+        with self.lock:
+            fingerprint = self.entries.get(url, {}).get('fingerprint')
+        return tuple(fingerprint) if fingerprint else None
+
+    def save(self):
+        with self.lock:
+            with open(self.path, 'w', encoding='utf-8') as file:
+                json.dump(self.entries, file)
+
+    def report(self):
+        total = self.hits + self.misses
+        ratio = 100.0 * self.hits / total if total else 0.0
+        log.info("Cache: %d/%d hits (%.1f%%), %.1f MB not downloaded", self.hits, total, ratio,
+                 self.bytes_saved / 1024 / 1024)
@@ -0,0 +1,171 @@
+# Command line interface:
+#
+#   python -m itk_site_viz parse sitemap.xml            list the sitemap's pages
+#   python -m itk_site_viz crawl sitemap.xml            crawl them into the crawl store
+#   python -m itk_site_viz render --output-dir out      write the reports of the last crawl, offline
+#   python -m itk_site_viz run sitemap.xml              crawl and render in one go (the default)
+#   python -m itk_site_viz diff                         report what changed since the previous crawl
+#
+# Only the modules a subcommand needs are imported, so render never loads requests or lxml.
+import argparse
+import json
+import logging
+import sys
+
+from .settings import (BASE_URL, CACHE_FILE, DEPENDENCY_SHARD_SIZE, MAX_RATE_PER_HOST, RUN_REPORT_FILE, STATE_FILE,
+                       STORE_FILE)
+
+log = logging.getLogger(__name__)
+
+# Function to list the sitemap's pages, one URL or one JSON record per line
+def parse_command(args):
+    from .sitemap import iter_sitemap
+
+    for entry in iter_sitemap(args.sitemap):
+        if args.json:
+            print(json.dumps(entry._asdict()))
+        else:
+            print(entry.loc)
+    return 0
+
+# Function to crawl the sitemap into the crawl store, for a later render
+def crawl_command(args):
+    from .metrics import RunMetrics
+    from .pipeline import crawl_site, write_run_reports
+
+    metrics = RunMetrics(trace_memory=args.trace_memory, profile_path=args.profile)
+    graph = crawl_site(args.sitemap, args.incremental, args.frontier, args.dedup, cache_path=args.cache,
+                       store_path=args.store, state_path=args.state, metrics=metrics,
+                       respect_robots=not args.ignore_robots, max_rate=args.max_rate,
+                       parse_workers=args.parse_workers)
+    metrics.set('graph_pages', len(graph))
+    metrics.set('graph_links', graph.num_edges)
+    write_run_reports(metrics, args.report, args.prometheus)
+    log.info("Crawled %d pages with %d links into %s", len(graph), graph.num_edges, args.store)
+    return 0
+
+# Function to write the reports of a finished crawl from the crawl store, without network access
+def render_command(args):
+    from .metrics import RunMetrics
+    from .pipeline import render_reports, write_run_reports
+    from .store import CrawlStore
+
+    store = CrawlStore(args.store)
+    try:
+        run_id = args.run or store.last_run()
+        if run_id is None:
+            log.error("No finished crawl in %s; run the crawl command first", args.store)
+            return 1
+        graph = store.link_graph(run_id)
+        failed_urls = [url for url, _, _ in store.failures(run_id)]
+    finally:
+        store.close()
+
+    metrics = RunMetrics(trace_memory=args.trace_memory, profile_path=args.profile)
+    render_reports(graph, args.output_dir, args.base_url, metrics, failed_urls, args.shard_by)
+    write_run_reports(metrics, args.report, args.prometheus)
+    return 0
+
+# Function to write the delta report between two crawls in the store, or two sitemaps
+def diff_command(args):
+    from .diff import diff_runs, diff_sitemaps, generate_diff_report
+    from .store import CrawlStore
+
+    if args.sitemaps:
+        diff = diff_sitemaps(*args.sitemaps)
+    else:
+        store = CrawlStore(args.store)
+        try:
+            diff = diff_runs(store, args.old, args.new)
+        except ValueError as e:
+            log.error("%s", e)
+            return 1
+        finally:
+            store.close()
+    generate_diff_report(diff, args.output_dir)
+    return 0
+
+# Function to crawl and render in one run
+def run_command(args):
+    from .pipeline import generate_html_graph
+
+    generate_html_graph(args.sitemap, args.incremental, args.frontier, args.dedup, report_path=args.report,
+                        prometheus_path=args.prometheus, profile_path=args.profile, trace_memory=args.trace_memory,
+                        output_dir=args.output_dir, base_url=args.base_url, cache_path=args.cache,
+                        store_path=args.store, state_path=args.state, respect_robots=not args.ignore_robots,
+                        max_rate=args.max_rate, parse_workers=args.parse_workers, shard_by=args.shard_by)
+    return 0
+
+# Function to build the argument parser
+def build_parser():
+    parser = argparse.ArgumentParser(prog='itk_site_viz', description='Crawl a sitemap and visualize the site')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log debug messages')
+    commands = parser.add_subparsers(dest='command')
+
+    sitemap = argparse.ArgumentParser(add_help=False)
+    sitemap.add_argument('sitemap', nargs='?', default='sitemap.xml', help='sitemap file or URL (default: %(default)s)')
+
+    crawling = argparse.ArgumentParser(add_help=False)
+    mode = crawling.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', action='store_true', help='refetch only pages whose <lastmod> changed')
+    mode.add_argument('--frontier', action='store_true', help='also follow links to pages the sitemap misses')
+    crawling.add_argument('--dedup', action='store_true', help='parse identical pages once and report duplicates')
+    crawling.add_argument('--cache', default=CACHE_FILE, help='conditional-GET cache file (default: %(default)s)')
+    crawling.add_argument('--state', default=STATE_FILE, help='incremental crawl state file (default: %(default)s)')
+    crawling.add_argument('--ignore-robots', action='store_true', help='crawl pages robots.txt disallows')
+    crawling.add_argument('--max-rate', type=float, default=MAX_RATE_PER_HOST,
+                          help='requests per second per host at most (default: no limit beyond robots.txt)')
+    crawling.add_argument('--parse-workers', type=int, default=0,
+                          help='parse pages in this many processes, for CPU-bound crawls (not with --frontier)')
+
+    store = argparse.ArgumentParser(add_help=False)
+    store.add_argument('--store', default=STORE_FILE, help='SQLite crawl store (default: %(default)s)')
+
+    rendering = argparse.ArgumentParser(add_help=False)
+    rendering.add_argument('--output-dir', default='.', help='directory the reports are written to')
+    rendering.add_argument('--base-url', default=BASE_URL, help='site the page paths are relative to '
+                                                                '(default: %(default)s)')
+    rendering.add_argument('--shard-by', choices=('prefix', 'count'),
+                           help='split the dependency report into an index and one file per site section '
+                                '(prefix) or per %d pages (count); default: one file' % DEPENDENCY_SHARD_SIZE)
+
+    instrumentation = argparse.ArgumentParser(add_help=False)
+    instrumentation.add_argument('--report', default=RUN_REPORT_FILE, help='JSON run report (default: %(default)s)')
+    instrumentation.add_argument('--prometheus', help='also write the metrics in Prometheus text format')
+    instrumentation.add_argument('--profile', help='write cProfile stats of the run here')
+    instrumentation.add_argument('--trace-memory', action='store_true', help='record the tracemalloc peak per stage')
+
+    parse = commands.add_parser('parse', parents=[sitemap], help="list the sitemap's pages")
+    parse.add_argument('--json', action='store_true', help='print loc, lastmod and priority as JSON lines')
+    parse.set_defaults(handler=parse_command)
+
+    crawl = commands.add_parser('crawl', parents=[sitemap, crawling, store, instrumentation],
+                                help='crawl the sitemap into the crawl store')
+    crawl.set_defaults(handler=crawl_command)
+
+    render = commands.add_parser('render', parents=[store, rendering, instrumentation],
+                                 help='write the reports of a finished crawl, offline')
+    render.add_argument('--run', type=int, help='crawl store run id (default: the last finished run)')
+    render.set_defaults(handler=render_command)
+
+    run = commands.add_parser('run', parents=[sitemap, crawling, store, rendering, instrumentation],
+                              help='crawl and render')
+    run.set_defaults(handler=run_command)
+
+    diff = commands.add_parser('diff', parents=[store], help='report what changed between two crawls or sitemaps')
+    diff.add_argument('--old', type=int, help='run id to compare against (default: the run before --new)')
+    diff.add_argument('--new', type=int, help='run id to compare (default: the last finished run)')
+    diff.add_argument('--sitemaps', nargs=2, metavar=('OLD', 'NEW'), help='compare two sitemaps instead')
+    diff.add_argument('--output-dir', default='.', help='directory the delta report is written to')
+    diff.set_defaults(handler=diff_command)
+    return parser
+
+# Function to run the command line; with no subcommand it crawls sitemap.xml and renders everything
+def main(argv=None):
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(argv + ['run'])
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+    return args.handler(args)
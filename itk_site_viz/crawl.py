@@ -0,0 +1,415 @@
+# Crawling: concurrent, pipelined, incremental and frontier crawls into a LinkGraph
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+import hashlib
+import heapq
+import json
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from .dedup import normalize_markup, page_simhash
+from .fetch import FetchResult, fetch_page, fetch_page_deduplicated
+from .graph import LinkGraph
+from .links import LINK_SELECTORS, _extract_links_timed
+from .scheduler import CrawlScheduler
+from .session import create_session
+from .settings import (BLOOM_ERROR_RATE, CRAWL_RETRY_STATUSES, DEFAULT_PRIORITY, FRONTIER_MAX_DEPTH, MAX_PER_HOST,
+                       MAX_WORKERS, PARSE_QUEUE_SIZE, PRIORITY_DECAY, STATE_FILE)
+from .sitemap import SitemapEntry, parse_lastmod
+from .urls import canonical_url, page_url, resolve_links, uses_trailing_slash
+
+log = logging.getLogger(__name__)
+
+# Function to scrape many pages concurrently, returns {url: links} for the pages fetched
+# successfully; failed pages are left out so a later run retries them. With a store,
+# each page is committed as it completes and pages already done by an interrupted
+# run of the same crawl are taken from the store instead of being fetched again. With a
+# DuplicateIndex, pages identical to one already parsed reuse its links. Every fetch is
+# recorded in metrics (a RunMetrics) when given. Fetches go through scheduler (by default
+# a CrawlScheduler with max_per_host), which applies robots.txt and the per-host limits.
+def crawl_pages(urls, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, session=None, cache=None,
+                selectors=LINK_SELECTORS, parse_workers=0, store=None, dedup=None, metrics=None, scheduler=None):
+    start = time.perf_counter()
+    links_by_url = {}
+    failed = []
+    # Size the connection pool to the crawl so every worker reuses a kept-alive connection;
+    # throttling answers are retried by the scheduler, which can pause the whole host
+    session = session or create_session(pool_size=max(max_workers, 1), retry_statuses=CRAWL_RETRY_STATUSES)
+    scheduler = scheduler or CrawlScheduler(session, max_per_host)
+
+    owns_run = store is not None and store.run_id is None
+    if owns_run:
+        store.begin_run(urls)
+    if store is not None:
+        links_by_url.update(store.completed(urls))
+        if links_by_url:
+            log.info("Resuming crawl: %d of %d pages already in the store", len(links_by_url), len(urls))
+        urls = [url for url in urls if url not in links_by_url]
+
+    def done(result):
+        if result.error is None:
+            if dedup is not None and result.status == 304:
+                fingerprint = cache.fingerprint(result.url)
+                if fingerprint:
+                    dedup.add(result.url, fingerprint, result.links)
+            result = result._replace(links=resolve_links(result.url, result.links))
+            links_by_url[result.url] = result.links
+        else:
+            failed.append(result.url)
+        if store is not None:
+            store.record(result)
+        if metrics is not None:
+            metrics.record_fetch(result)
+
+    def fetch_one(url):
+        if dedup is not None:
+            return fetch_page_deduplicated(url, dedup, session, cache=cache, selectors=selectors)
+        return fetch_page(url, session, cache=cache, selectors=selectors)
+
+    def fetch(url):
+        return scheduler.run(url, fetch_one)
+
+    if parse_workers > 0:
+        _crawl_pipelined(urls, max(max_workers, 1), scheduler, session, cache, selectors, parse_workers, done,
+                         dedup=dedup)
+    elif max_workers <= 1:
+        for url in urls:
+            done(fetch(url))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fetch, url) for url in urls]
+            try:
+                for future in as_completed(futures):
+                    done(future.result())
+            except BaseException:
+                # Ctrl-C: drop the queued pages and wake the fetchers waiting on a host
+                scheduler.close()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    if owns_run:
+        store.finish_run()
+    scheduler.report(metrics)
+    elapsed = time.perf_counter() - start
+    rate = len(urls) / elapsed if elapsed > 0 else 0.0
+    log.info("Crawled %d pages in %.1fs (%.1f pages/sec), %d failed", len(urls), elapsed, rate, len(failed))
+    return links_by_url
+
+# Two-stage crawl: fetcher threads push raw bodies into a bounded queue and a process
+# pool parses them, so parsing uses every core and never stalls the network side.
+# done is called on the calling thread with each page's final FetchResult. With dedup
+# the fetchers fingerprint each body and only bodies not seen before reach the parsers.
+def _crawl_pipelined(urls, max_workers, scheduler, session, cache, selectors, parse_workers, done,
+                     queue_size=PARSE_QUEUE_SIZE, dedup=None):
+    bodies = queue.Queue(maxsize=queue_size)
+    stopping = threading.Event()
+    fingerprints = {}
+
+    def fetch_body(url):
+        return fetch_page(url, session, cache=cache, selectors=selectors, parse=False)
+
+    def fetch(url):
+        result = FetchResult(url, [], None, None, None, error='not fetched')
+        try:
+            if not stopping.is_set():
+                result = scheduler.run(url, fetch_body)
+                if dedup is not None and result.body is not None:
+                    # Fingerprint here; only bodies not seen before go on to the parsers
+                    markup, digest = normalize_markup(result.body)
+                    known = dedup.lookup(digest)
+                    if known is not None:
+                        links, simhash = known
+                        dedup.add(url, (digest, simhash), links)
+                        if cache:
+                            cache.store(url, result.headers, links, len(result.body), (digest, simhash))
+                        result = result._replace(links=links, body=None)
+                    else:
+                        fingerprints[url] = (digest, page_simhash(markup))
+        finally:
+            # Blocks while the parsers are behind, until the crawl is interrupted
+            while not stopping.is_set():
+                try:
+                    bodies.put(result, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    # Forking while the fetcher threads run can deadlock the children: start the parsers
+    # from a fork server (spawn on Windows, which has no fork) instead
+    context = multiprocessing.get_context('spawn' if os.name == 'nt' else 'forkserver')
+    with ThreadPoolExecutor(max_workers=max_workers) as fetchers, \
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=context) as parsers:
+        for url in urls:
+            fetchers.submit(fetch, url)
+
+        try:
+            received = 0
+            parsing = {}
+            while received < len(urls) or parsing:
+                # Keep a couple of bodies per parser in flight; anything beyond that waits in
+                # the queue, and a full queue pushes back on the fetchers
+                if received < len(urls) and len(parsing) < parse_workers * 2:
+                    result = bodies.get()
+                    received += 1
+                    if result.links is not None:
+                        done(result)
+                    else:
+                        parsing[parsers.submit(_extract_links_timed, result.body, selectors, result.encoding)] = result
+                    continue
+
+                finished, _ = wait(parsing, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = parsing.pop(future)
+                    try:
+                        links, parse_seconds = future.result()
+                    except Exception as e:
+                        log.warning("Unexpected error processing %s: %s", result.url, e)
+                        done(result._replace(links=[], body=None, error=str(e)))
+                        continue
+                    fingerprint = fingerprints.pop(result.url, None)
+                    if fingerprint is not None:
+                        dedup.add(result.url, fingerprint, links)
+                    if cache:
+                        cache.store(result.url, result.headers, links, len(result.body), fingerprint)
+                    done(result._replace(links=links, body=None, parse_seconds=parse_seconds))
+        except BaseException:
+            # Ctrl-C: stop the fetchers, including any waiting on the full queue
+            stopping.set()
+            scheduler.close()
+            fetchers.shutdown(wait=False, cancel_futures=True)
+            parsers.shutdown(wait=False, cancel_futures=True)
+            raise
+
+# Function to crawl the sitemap pages into a LinkGraph; with dedup, exact duplicate pages
+# are merged into one node
+def build_link_graph(urls, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, session=None, cache=None,
+                     selectors=LINK_SELECTORS, parse_workers=0, store=None, dedup=None, metrics=None, scheduler=None):
+    links_by_url = crawl_pages(urls, max_workers, max_per_host, session, cache, selectors, parse_workers, store,
+                               dedup, metrics, scheduler)
+    if dedup is not None:
+        urls, links_by_url = dedup.merge(urls, links_by_url)
+    return LinkGraph.from_links(urls, links_by_url)
+
+# Function to build a dependency map
+def build_dependency_map(urls, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, session=None, cache=None,
+                         selectors=LINK_SELECTORS, parse_workers=0, store=None, dedup=None):
+    graph = build_link_graph(urls, max_workers, max_per_host, session, cache, selectors, parse_workers, store,
+                             dedup)
+    return graph.to_dependency_maps()
+
+# Function to decide whether a page changed since it was last crawled
+def needs_rescrape(entry, record):
+    if record is None:
+        return True  # New page
+    lastmod = parse_lastmod(entry.lastmod)
+    if lastmod is None or entry.lastmod != record.get('lastmod'):
+        return True
+    crawled_at = parse_lastmod(record.get('crawled_at'))
+    return crawled_at is None or lastmod > crawled_at
+
+# Function to crawl only pages the sitemap reports as changed, returns {url: links} for every page
+def crawl_pages_incremental(entries, state_file=STATE_FILE, **crawl_options):
+    state = {'pages': {}}
+    if os.path.exists(state_file):
+        with open(state_file, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+    previous = state['pages']
+
+    urls = [entry.loc for entry in entries]
+    stale = [entry for entry in entries if needs_rescrape(entry, previous.get(entry.loc))]
+    removed = len(set(previous) - set(urls))
+    log.info("Incremental crawl: %d of %d pages new or changed, %d removed", len(stale), len(urls), removed)
+
+    # With a store the run covers the whole sitemap: unchanged pages are recorded with
+    # their previous links so the run reads back as the complete graph
+    store = crawl_options.get('store')
+    stale_urls = {entry.loc for entry in stale}
+    if store is not None:
+        store.begin_run(urls)
+
+    crawled_at = datetime.now(timezone.utc).isoformat()
+    fresh = crawl_pages([entry.loc for entry in stale], **crawl_options) if stale else {}
+
+    # Pages no longer in the sitemap are dropped by rebuilding from the current entries;
+    # a changed page that failed keeps its old links, a new one is retried next run
+    pages = {}
+    for entry in entries:
+        if entry.loc in fresh:
+            pages[entry.loc] = {'lastmod': entry.lastmod, 'crawled_at': crawled_at, 'links': fresh[entry.loc]}
+        elif entry.loc in previous:
+            pages[entry.loc] = previous[entry.loc]
+            if store is not None and entry.loc not in stale_urls:
+                store.record_links(entry.loc, pages[entry.loc]['links'])
+            elif store is not None:
+                store.carry_links(entry.loc, pages[entry.loc]['links'])  # Failed to refetch
+    if store is not None:
+        store.finish_run()
+
+    with open(state_file, 'w', encoding='utf-8') as file:
+        json.dump({'crawled_at': crawled_at, 'pages': pages}, file)
+
+    return {url: page['links'] for url, page in pages.items()}
+
+# Function to build a LinkGraph, re-scraping only pages the sitemap reports as changed
+def build_link_graph_incremental(entries, state_file=STATE_FILE, **crawl_options):
+    links_by_url = crawl_pages_incremental(entries, state_file, **crawl_options)
+    urls = [entry.loc for entry in entries]
+    if crawl_options.get('dedup') is not None:
+        urls, links_by_url = crawl_options['dedup'].merge(urls, links_by_url)
+    return LinkGraph.from_links(urls, links_by_url)
+
+# Function to build a dependency map, re-scraping only pages the sitemap reports as changed
+def build_dependency_map_incremental(entries, state_file=STATE_FILE, **crawl_options):
+    return build_link_graph_incremental(entries, state_file, **crawl_options).to_dependency_maps()
+
+# Fixed-size probabilistic seen-set for very large crawls: membership tests can return
+# false positives (at about error_rate once capacity URLs are added), never false negatives
+class BloomFilter:
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        return [(a + i * b) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+# Function to crawl outward from the sitemap pages, following every resolved link to a
+# page on an allowed host (by default the sitemap's hosts) up to max_depth hops away.
+# The frontier is a priority queue: sitemap pages start at their <priority>, discovered
+# pages at the priority of the page that first linked to them times PRIORITY_DECAY,
+# ties go to shallower pages. Pages are told apart by canonical_url. Sitemap pages keep
+# their sitemap URL; discovered pages are fetched and stored as page_url, which drops the
+# query and adds a trailing slash when the sitemap's URLs have one. Links to allowed
+# hosts are rewritten the same way, so the graph does not depend on which page answered
+# first. Returns (urls, {url: links}) with urls in discovery order; failed pages are
+# missing from the dict.
+def crawl_frontier(entries, max_depth=FRONTIER_MAX_DEPTH, hosts=None, max_pages=None, max_workers=MAX_WORKERS,
+                   max_per_host=MAX_PER_HOST, session=None, cache=None, selectors=LINK_SELECTORS, store=None,
+                   bloom_capacity=None, dedup=None, metrics=None, scheduler=None):
+    start = time.perf_counter()
+    entries = [entry if isinstance(entry, SitemapEntry) else SitemapEntry(entry, None, None) for entry in entries]
+    seeds = list(dict.fromkeys(entry.loc for entry in entries))
+    hosts = set(hosts) if hosts else {urlsplit(canonical_url(url)).netloc for url in seeds}
+    seen = BloomFilter(bloom_capacity) if bloom_capacity else set()
+    seed_urls = {}  # Canonical URL -> sitemap URL
+    for url in seeds:
+        seed_urls.setdefault(canonical_url(url), url)
+    trailing_slash = uses_trailing_slash(seeds)
+    session = session or create_session(pool_size=max(max_workers, 1), retry_statuses=CRAWL_RETRY_STATUSES)
+    scheduler = scheduler or CrawlScheduler(session, max_per_host)
+
+    urls = []
+    links_by_url = {}
+    failed = set()
+    frontier = []  # (-priority, depth, order, url)
+
+    # Function to give the URL a link to url is crawled and stored as
+    def crawl_url(url):
+        return seed_urls.get(canonical_url(url)) or page_url(url, trailing_slash)
+
+    def enqueue(url, priority, depth):
+        key = canonical_url(url)
+        if key in seen:
+            return
+        seen.add(key)
+        urls.append(url)
+        heapq.heappush(frontier, (-priority, depth, len(urls), url))
+
+    for entry in entries:
+        priority = entry.priority if entry.priority is not None else DEFAULT_PRIORITY
+        enqueue(entry.loc, priority, 0)
+
+    stored = {}
+    if store is not None:
+        store.begin_run(seeds)
+        stored = store.completed()
+        if stored:
+            log.info("Resuming crawl: %d pages already in the store", len(stored))
+
+    def expand(url, links, priority, depth):
+        found = []
+        for link in links:
+            if urlsplit(canonical_url(link)).netloc in hosts:
+                link = crawl_url(link)
+                if depth < max_depth:
+                    enqueue(link, priority * PRIORITY_DECAY, depth + 1)
+            found.append(link)
+        links_by_url[url] = list(dict.fromkeys(found))
+
+    def fetch_one(url):
+        if dedup is not None:
+            return fetch_page_deduplicated(url, dedup, session, cache=cache, selectors=selectors)
+        return fetch_page(url, session, cache=cache, selectors=selectors)
+
+    def fetch(url):
+        return scheduler.run(url, fetch_one)
+
+    started = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+        try:
+            while frontier or in_flight:
+                while frontier and len(in_flight) < max_workers and (max_pages is None or started < max_pages):
+                    neg_priority, depth, _, url = heapq.heappop(frontier)
+                    started += 1
+                    if url in stored:
+                        expand(url, stored[url], -neg_priority, depth)
+                    else:
+                        in_flight[executor.submit(fetch, url)] = (url, -neg_priority, depth)
+                if not in_flight:
+                    break
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    url, priority, depth = in_flight.pop(future)
+                    result = future.result()
+                    if result.error is None:
+                        expand(url, resolve_links(url, result.links), priority, depth)
+                        result = result._replace(links=links_by_url[url])  # Stored as in the graph
+                    else:
+                        failed.add(url)
+                    if store is not None:
+                        store.record(result)
+                    if metrics is not None:
+                        metrics.record_fetch(result)
+        except BaseException:
+            # Ctrl-C: drop the queued pages and wake the fetchers waiting on a host
+            scheduler.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    # Pages still waiting when max_pages ran out are not part of the graph
+    urls = [url for url in urls if url in links_by_url or url in failed]
+    if store is not None:
+        store.set_urls(urls)
+        store.finish_run()
+    scheduler.report(metrics)
+    elapsed = time.perf_counter() - start
+    rate = started / elapsed if elapsed > 0 else 0.0
+    log.info("Frontier crawl: %d pages (%d beyond the sitemap) in %.1fs (%.1f pages/sec), %d failed",
+             len(urls), len(urls) - len(seeds), elapsed, rate, len(failed))
+    return urls, links_by_url
+
+# Function to build a LinkGraph of every page reachable from the sitemap
+def build_link_graph_frontier(entries, **crawl_options):
+    urls, links_by_url = crawl_frontier(entries, **crawl_options)
+    if crawl_options.get('dedup') is not None:
+        urls, links_by_url = crawl_options['dedup'].merge(urls, links_by_url)
+    return LinkGraph.from_links(urls, links_by_url)
@@ -0,0 +1,141 @@
+# Exact and near-duplicate page detection
+import hashlib
+import json
+import logging
+import re
+import threading
+
+import numpy as np
+
+from .links import LINK_SELECTORS, extract_links
+from .settings import SIMHASH_BANDS, SIMHASH_BUCKET_LIMIT, SIMHASH_DISTANCE
+
+log = logging.getLogger(__name__)
+
+# Markup that differs between otherwise identical renderings of a page
+_VOLATILE_MARKUP = re.compile(rb'<(?:script\b.*?</script\s*>|style\b.*?</style\s*>|!--.*?-->)', re.S | re.I)
+_TAG = re.compile(rb'<[^>]*>')
+
+# Function to reduce a page body to the markup duplicate detection compares: no
+# scripts, styles or comments, whitespace runs collapsed. Returns (markup, digest);
+# equal digests mean the same links.
+def normalize_markup(body):
+    markup = b' '.join(_VOLATILE_MARKUP.sub(b'', body).split())
+    return markup, hashlib.sha1(markup).hexdigest()
+
+# Function to compute the 64-bit SimHash of normalized markup over the word 3-shingles
+# of its text; near-identical pages get fingerprints a few bits apart
+def page_simhash(markup):
+    words = _TAG.sub(b' ', markup).lower().split()
+    if not words:
+        return 0
+    vocabulary = {}
+    ids = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for word in words), np.int64, len(words))
+    hashes = np.fromiter((int.from_bytes(hashlib.blake2b(word, digest_size=8).digest(), 'little')
+                          for word in vocabulary), np.uint64, len(vocabulary))[ids]
+    if len(hashes) >= 3:
+        # Mix neighbouring word hashes into shingle hashes (wrapping uint64 arithmetic)
+        hashes = hashes[:-2] * np.uint64(0x9E3779B97F4A7C15) + hashes[1:-1] * np.uint64(0xC2B2AE3D27D4EB4F) + hashes[2:]
+    bits = np.unpackbits(hashes.astype('<u8').view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    majority = bits.sum(axis=0) * 2 > len(hashes)
+    return int(np.packbits(majority, bitorder='little').view('<u8')[0])
+
+# Duplicate detection across a crawl. A page whose digest was already seen reuses the
+# first copy's links and SimHash instead of being parsed again; clusters() groups the
+# exact copies and the near-duplicates found by SimHash. Pages are added with their
+# fingerprint, the (digest, simhash) pair. Thread-safe.
+class DuplicateIndex:
+    def __init__(self, distance=SIMHASH_DISTANCE, bands=SIMHASH_BANDS):
+        self.distance = distance
+        self.bands = bands
+        self.band_bits = 64 // bands
+        self.known = {}  # digest -> (links, simhash) of its first page
+        self.pages = {}  # url -> (digest, simhash)
+        self.buckets = {}  # (band, value) -> urls
+        self.parent = {}  # union-find over near-duplicate urls
+        self.parses_skipped = 0
+        self.lock = threading.Lock()
+
+    # (links, simhash) of an earlier page with this digest, or None if the page has to be parsed
+    def lookup(self, digest):
+        with self.lock:
+            known = self.known.get(digest)
+            if known is not None:
+                self.parses_skipped += 1
+                return list(known[0]), known[1]
+        return None
+
+    # Fingerprint and links of a fetched body, parsing it only if it is new
+    def resolve(self, body, selectors=LINK_SELECTORS, encoding=None):
+        markup, digest = normalize_markup(body)
+        known = self.lookup(digest)
+        if known is not None:
+            links, simhash = known
+        else:
+            links = extract_links(body, selectors, encoding)
+            simhash = page_simhash(markup)
+        return (digest, simhash), links
+
+    def _find(self, url):
+        while self.parent[url] != url:
+            self.parent[url] = self.parent[self.parent[url]]
+            url = self.parent[url]
+        return url
+
+    # Record a page with its fingerprint and links
+    def add(self, url, fingerprint, links):
+        digest, simhash = fingerprint
+        mask = (1 << self.band_bits) - 1
+        with self.lock:
+            if url in self.pages:
+                return
+            self.known.setdefault(digest, (list(links), simhash))
+            self.pages[url] = (digest, simhash)
+            self.parent[url] = url
+            for band in range(self.bands):
+                bucket = self.buckets.setdefault((band, (simhash >> (band * self.band_bits)) & mask), [])
+                for other in bucket[-SIMHASH_BUCKET_LIMIT:]:
+                    if bin(simhash ^ self.pages[other][1]).count('1') <= self.distance:
+                        self.parent[self._find(url)] = self._find(other)
+                bucket.append(url)
+
+    # (exact, near): lists of url clusters in first-seen order. exact clusters share a
+    # digest; near clusters join pages within the SimHash distance and hold more than
+    # one distinct page.
+    def clusters(self):
+        with self.lock:
+            exact = {}
+            near = {}
+            for url, (digest, _) in self.pages.items():
+                exact.setdefault(digest, []).append(url)
+                near.setdefault(self._find(url), []).append(url)
+            return ([urls for urls in exact.values() if len(urls) > 1],
+                    [urls for urls in near.values() if len({self.pages[url][0] for url in urls}) > 1])
+
+    # Drop exact duplicates from a crawl result: every copy is replaced by the first one
+    # in urls (preferring pages of this crawl), and links to a copy point at that page,
+    # whatever order the fetches finished in. Returns (urls, {url: links}).
+    def merge(self, urls, links_by_url):
+        order = {url: i for i, url in reversed(list(enumerate(urls)))}
+        alias = {}
+        for cluster in self.clusters()[0]:
+            keep = min(cluster, key=lambda url: (url not in links_by_url, order.get(url, len(order))))
+            for url in cluster:
+                if url != keep:
+                    alias[url] = keep
+        urls = [url for url in urls if url not in alias]
+        links_by_url = {url: [alias.get(link, link) for link in links]
+                        for url, links in links_by_url.items() if url not in alias}
+        return urls, links_by_url
+
+    # Write the duplicate clusters as JSON
+    def save(self, path):
+        exact, near = self.clusters()
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'exact': exact, 'near': near}, file, indent=1)
+
+    def report(self):
+        exact, near = self.clusters()
+        log.info("Duplicates: %d pages in %d exact clusters, %d pages in %d near-duplicate clusters, "
+                 "%d parses skipped", sum(len(c) for c in exact), len(exact), sum(len(c) for c in near), len(near),
+                 self.parses_skipped)
@@ -0,0 +1,144 @@
+# Crawl comparison: what changed between two crawl store runs, or between two sitemaps
+from collections import namedtuple
+import html
+import json
+import logging
+import os
+
+from .settings import DIFF_FILE, DIFF_REPORT_FILE
+
+log = logging.getLogger(__name__)
+
+# Changes from old to new (run ids or sitemap sources). The pages_* fields are sorted URL
+# lists: pages_failing loaded before and fail now, pages_recovered the reverse, and
+# pages_changed have different links (different <lastmod> when comparing sitemaps).
+# links_added and links_removed are (source, target) pairs of a page's own links, and
+# newly_orphaned lists the pages nothing links to any more.
+CrawlDiff = namedtuple('CrawlDiff', ['old', 'new', 'pages_added', 'pages_removed', 'pages_failing',
+                                     'pages_recovered', 'pages_changed', 'links_added', 'links_removed',
+                                     'newly_orphaned'])
+
+# Function to compare two finished runs of a crawl store, by default the last two. Only the
+# pages that differ leave SQLite, so the work in Python follows the number of changes.
+def diff_runs(store, old_run=None, new_run=None):
+    new_run = new_run if new_run is not None else store.last_run()
+    if old_run is None and new_run is not None:
+        old_run = store.previous_run(new_run)
+    if old_run is None or new_run is None:
+        raise ValueError("Comparing crawls needs two finished runs in the crawl store")
+
+    added, removed, failing, recovered, changed = [], [], [], [], []
+    links_added, links_removed = [], []
+    for url, old_status, old_links, new_status, new_links in store.changed_pages(old_run, new_run):
+        before = set(json.loads(old_links)) if old_status == 'ok' else set()
+        after = set(json.loads(new_links)) if new_status == 'ok' else set()
+        if old_status is None:
+            added.append(url)
+        elif new_status is None:
+            removed.append(url)
+        elif old_status != new_status:
+            # The links on the failing side are unknown, so they are not compared
+            (failing if new_status == 'error' else recovered).append(url)
+            continue
+        elif before != after:
+            changed.append(url)
+        links_added.extend((url, link) for link in after - before)
+        links_removed.extend((url, link) for link in before - after)
+
+    return CrawlDiff(old_run, new_run, sorted(added), sorted(removed), sorted(failing), sorted(recovered),
+                     sorted(changed), sorted(links_added), sorted(links_removed),
+                     store.newly_orphaned(old_run, new_run))
+
+# Function to compare the page lists of two sitemaps (files or URLs): pages added, removed
+# and with a changed <lastmod>. Only the old sitemap is held in memory.
+def diff_sitemaps(old_source, new_source):
+    from .sitemap import iter_sitemap
+
+    old = {entry.loc: entry.lastmod for entry in iter_sitemap(old_source)}
+    seen = set()
+    added, changed = [], []
+    for entry in iter_sitemap(new_source):
+        if entry.loc in seen:
+            continue
+        seen.add(entry.loc)
+        if entry.loc not in old:
+            added.append(entry.loc)
+        elif old.pop(entry.loc) != entry.lastmod:
+            changed.append(entry.loc)
+    return CrawlDiff(old_source, new_source, sorted(added), sorted(old), [], [], sorted(changed), [], [], [])
+
+# Function to turn a CrawlDiff into the JSON-ready delta report
+def diff_report(diff):
+    pages = {name: getattr(diff, name) for name in ('pages_added', 'pages_removed', 'pages_failing',
+                                                    'pages_recovered', 'pages_changed', 'newly_orphaned')}
+    links = {name: [{'source': source, 'target': target} for source, target in getattr(diff, name)]
+             for name in ('links_added', 'links_removed')}
+    return {
+        'old': diff.old,
+        'new': diff.new,
+        'summary': {name: len(values) for name, values in {**pages, **links}.items()},
+        **pages,
+        **links,
+    }
+
+# Section headings of the HTML delta report, in page order
+DIFF_SECTIONS = (
+    ('pages_added', 'Pages added'),
+    ('pages_removed', 'Pages removed'),
+    ('pages_failing', 'Pages failing to load'),
+    ('pages_recovered', 'Pages loading again'),
+    ('newly_orphaned', 'Newly orphaned pages'),
+    ('pages_changed', 'Pages with changed links'),
+    ('links_removed', 'Links removed'),
+    ('links_added', 'Links added'),
+)
+
+# Function to stream the delta report page to an open text file; empty sections are left out
+def write_diff_html(out, diff):
+    out.write(f'''<html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <title>Crawl Changes</title>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+            }}
+        </style>
+    </head>
+    <body>
+        <h1>Crawl Changes: {html.escape(str(diff.old))} &rarr; {html.escape(str(diff.new))}</h1>
+''')
+    sections = [(name, heading, getattr(diff, name)) for name, heading in DIFF_SECTIONS]
+    if not any(values for _, _, values in sections):
+        out.write('        <p>No changes.</p>\n')
+    out.write('        <ul>\n')
+    out.writelines(f'<li><a href="#{name}">{heading}</a> ({len(values)})</li>\n'
+                   for name, heading, values in sections if values)
+    out.write('        </ul>\n')
+    for name, heading, values in sections:
+        if not values:
+            continue
+        out.write(f'        <h2 id="{name}">{heading}</h2>\n        <ul>\n')
+        for value in values:
+            if isinstance(value, tuple):
+                source, target = (html.escape(url) for url in value)
+                out.write(f'<li><a href="{source}">{source}</a> &rarr; <a href="{target}">{target}</a></li>\n')
+            else:
+                url = html.escape(value)
+                out.write(f'<li><a href="{url}">{url}</a></li>\n')
+        out.write('        </ul>\n')
+    out.write('    </body>\n</html>\n')
+
+# Function to write the delta report (HTML page and JSON) into output_dir
+def generate_diff_report(diff, output_dir='.'):
+    os.makedirs(output_dir, exist_ok=True)
+    report = diff_report(diff)
+    with open(os.path.join(output_dir, DIFF_REPORT_FILE), 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    path = os.path.join(output_dir, DIFF_FILE)
+    with open(path, 'w', encoding='utf-8') as file:
+        write_diff_html(file, diff)
+    log.info("Crawl changes %s -> %s written to %s: %s", diff.old, diff.new, path,
+             ', '.join(f'{count} {name.replace("_", " ")}' for name, count in report['summary'].items() if count)
+             or 'no changes')
+    return report
@@ -0,0 +1,147 @@
+# Fetching single pages
+from collections import namedtuple
+from urllib.parse import urlsplit
+import hashlib
+import logging
+import os
+import time
+
+import requests
+
+from .links import LINK_SELECTORS, LinkExtractor, content_charset
+from .session import get_session
+from .settings import CHUNK_SIZE, CONNECT_TIMEOUT, HEAD_EXTENSIONS, MAX_BODY_SIZE, READ_TIMEOUT, THROTTLE_STATUSES
+
+log = logging.getLogger(__name__)
+
+# Outcome of fetching one page. links is None only while body still has to be parsed;
+# otherwise it is already known (cache hit, non-HTML, error, or parsed while streaming).
+# status is the HTTP status code, content_hash the SHA-1 of the body as downloaded, and
+# error is set (with status None unless the server answered) when the fetch failed.
+# size is the body bytes downloaded, fetch_seconds the wall time of the whole fetch and
+# parse_seconds the part of it spent in the link extractor. throttled counts the 429/503
+# answers the session retried before this response, and truncated is set when the body
+# was cut off at the size limit.
+FetchResult = namedtuple('FetchResult', ['url', 'links', 'body', 'encoding', 'headers', 'status', 'content_hash',
+                                         'error', 'size', 'fetch_seconds', 'parse_seconds', 'throttled', 'truncated'],
+                         defaults=(None, None, None, 0, 0.0, 0.0, 0, False))
+
+# Function to count the throttling answers urllib3 retried on the way to response
+def _throttled(response):
+    retries = getattr(response.raw, 'retries', None) if response is not None else None
+    return sum(1 for attempt in retries.history if attempt.status in THROTTLE_STATUSES) if retries else 0
+
+# Function to tell whether a response is not an HTML page, to be skipped unread
+def _not_html(url, response, cache):
+    if 'text/html' in response.headers.get('Content-Type', ''):
+        return False
+    log.info("Skipping non-HTML content: %s", url)
+    if cache:
+        cache.store(url, response.headers, [], int(response.headers.get('Content-Length') or 0))
+    return True
+
+# Function to fetch a page. With parse=True the body is parsed while it downloads;
+# with parse=False the raw body is returned for a separate parsing stage. Either way at
+# most max_size bytes of it are read.
+def fetch_page(url, session=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), cache=None, selectors=LINK_SELECTORS,
+               parse=True, max_size=MAX_BODY_SIZE):
+    start = time.perf_counter()
+    result = _fetch_page(url, session, timeout, cache, selectors, parse, max_size)
+    return result._replace(fetch_seconds=time.perf_counter() - start)
+
+def _fetch_page(url, session, timeout, cache, selectors, parse, max_size):
+    try:
+        session = session or get_session()
+        headers = cache.conditional_headers(url) if cache else {}
+        if os.path.splitext(urlsplit(url).path)[1].lower() in HEAD_EXTENSIONS:
+            # Probably a download: look at the headers before asking for the body.
+            # Errors are left to the GET, which reports them as usual.
+            response = session.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+            if response.status_code == 304 and cache:
+                return FetchResult(url, cache.hit(url), None, None, response.headers, 304,
+                                   throttled=_throttled(response))
+            if response.ok and _not_html(url, response, cache):
+                return FetchResult(url, [], None, None, response.headers, response.status_code,
+                                   throttled=_throttled(response))
+
+        with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            status = response.status_code
+            throttled = _throttled(response)
+            if status == 304 and cache:
+                # Unchanged since the last run
+                return FetchResult(url, cache.hit(url), None, None, response.headers, status, throttled=throttled)
+            response.raise_for_status()  # Check for HTTP errors
+
+            # Check Content-Type to ensure it's HTML, ignore pdfs and so on; closing the
+            # response drops the rest of the body unread
+            if _not_html(url, response, cache):
+                return FetchResult(url, [], None, None, response.headers, status, throttled=throttled)
+
+            # Parse while the body is still downloading, or collect it for the parsers
+            encoding = content_charset(response.headers['Content-Type'])
+            extractor = LinkExtractor(selectors, encoding) if parse else None
+            chunks = []
+            digest = hashlib.sha1()
+            size = 0
+            truncated = False
+            parse_seconds = 0.0
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if size + len(chunk) > max_size:
+                    chunk = chunk[:max_size - size]
+                    truncated = True
+                size += len(chunk)
+                digest.update(chunk)
+                if extractor is None:
+                    chunks.append(chunk)
+                else:
+                    parse_start = time.perf_counter()
+                    extractor.feed(chunk)
+                    parse_seconds += time.perf_counter() - parse_start
+                if truncated:
+                    log.warning("Page %s is larger than %d bytes, reading only the first ones", url, max_size)
+                    break
+            if extractor is None:
+                body = b''.join(chunks)
+                return FetchResult(url, None, body, encoding, response.headers, status, digest.hexdigest(),
+                                   size=size, throttled=throttled, truncated=truncated)
+            parse_start = time.perf_counter()
+            links = extractor.close()
+            parse_seconds += time.perf_counter() - parse_start
+        if cache:
+            cache.store(url, response.headers, links, size)
+        return FetchResult(url, links, None, encoding, response.headers, status, digest.hexdigest(), size=size,
+                           parse_seconds=parse_seconds, throttled=throttled, truncated=truncated)
+    except requests.RequestException as e:
+        log.warning("Error scraping %s: %s", url, e)
+        response = getattr(e, 'response', None)
+        if response is None:
+            return FetchResult(url, [], None, None, None, error=str(e))
+        # Headers are kept for Retry-After
+        return FetchResult(url, [], None, None, response.headers, response.status_code, error=str(e),
+                           throttled=_throttled(response))
+    except Exception as e:
+        log.exception("Unexpected error processing %s", url)
+        return FetchResult(url, [], None, None, None, error=str(e))
+
+# Function to fetch a page and parse it only if no identical page was parsed before
+def fetch_page_deduplicated(url, dedup, session=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), cache=None,
+                            selectors=LINK_SELECTORS):
+    result = fetch_page(url, session, timeout, cache, selectors, parse=False)
+    if result.body is None:
+        return result
+    start = time.perf_counter()
+    try:
+        fingerprint, links = dedup.resolve(result.body, selectors, result.encoding)
+    except Exception as e:
+        log.exception("Unexpected error processing %s", url)
+        return result._replace(links=[], body=None, error=str(e))
+    elapsed = time.perf_counter() - start
+    dedup.add(url, fingerprint, links)
+    if cache:
+        cache.store(url, result.headers, links, len(result.body), fingerprint)
+    return result._replace(links=links, body=None, fetch_seconds=result.fetch_seconds + elapsed,
+                           parse_seconds=elapsed)
+
+# Function to scrape a page for links
+def scrape_page(url, session=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), cache=None, selectors=LINK_SELECTORS):
+    return fetch_page(url, session, timeout, cache, selectors).links
@@ -0,0 +1,91 @@
+# Compact link graph of the crawled pages
+from array import array
+
+# Element type of the LinkGraph id arrays: 32-bit ints, plenty for any site
+GRAPH_TYPECODE = 'i'
+
+# Compact link graph. Page URLs are interned to dense integer ids in sitemap order,
+# and edges are kept in CSR form: the pages that page i links to are
+# out_targets[out_offsets[i]:out_offsets[i + 1]], and the pages linking to it are
+# in_sources[in_offsets[i]:in_offsets[i + 1]]. Edges are deduplicated and only
+# connect pages of the graph.
+class LinkGraph:
+    def __init__(self, urls, out_offsets, out_targets, in_offsets, in_sources, ids=None):
+        self.urls = urls
+        self.ids = ids if ids is not None else {url: i for i, url in enumerate(urls)}
+        self.out_offsets = out_offsets
+        self.out_targets = out_targets
+        self.in_offsets = in_offsets
+        self.in_sources = in_sources
+
+    # Build from crawl results ({url: hrefs}); links to pages outside urls are dropped
+    @classmethod
+    def from_links(cls, urls, links_by_url):
+        urls = list(dict.fromkeys(urls))
+        ids = {url: i for i, url in enumerate(urls)}
+        out_offsets = array(GRAPH_TYPECODE, [0])
+        out_targets = array(GRAPH_TYPECODE)
+        in_counts = [0] * len(urls)
+        for url in urls:
+            # Keep first-seen order within a page, drop repeats
+            for target in dict.fromkeys(ids[link] for link in links_by_url.get(url, ()) if link in ids):
+                out_targets.append(target)
+                in_counts[target] += 1
+            out_offsets.append(len(out_targets))
+
+        # Reverse edges by counting sort; sources come out in id (sitemap) order
+        in_offsets = array(GRAPH_TYPECODE, [0])
+        for count in in_counts:
+            in_offsets.append(in_offsets[-1] + count)
+        in_sources = array(GRAPH_TYPECODE, bytes(out_targets.itemsize * len(out_targets)))
+        cursor = array(GRAPH_TYPECODE, in_offsets[:-1])
+        for source in range(len(urls)):
+            for k in range(out_offsets[source], out_offsets[source + 1]):
+                target = out_targets[k]
+                in_sources[cursor[target]] = source
+                cursor[target] += 1
+        return cls(urls, out_offsets, out_targets, in_offsets, in_sources, ids)
+
+    # Build from the dependency / reverse dependency maps returned by build_dependency_map
+    @classmethod
+    def from_dependency_maps(cls, dependencies, reverse_dependencies):
+        urls = list(dict.fromkeys(list(dependencies) + list(reverse_dependencies)))
+        return cls.from_links(urls, reverse_dependencies)
+
+    def __len__(self):
+        return len(self.urls)
+
+    @property
+    def num_edges(self):
+        return len(self.out_targets)
+
+    def out_degree(self, i):
+        return self.out_offsets[i + 1] - self.out_offsets[i]
+
+    def in_degree(self, i):
+        return self.in_offsets[i + 1] - self.in_offsets[i]
+
+    # Ids of the pages page i links to
+    def successors(self, i):
+        return self.out_targets[self.out_offsets[i]:self.out_offsets[i + 1]]
+
+    # Ids of the pages linking to page i
+    def predecessors(self, i):
+        return self.in_sources[self.in_offsets[i]:self.in_offsets[i + 1]]
+
+    # (source, target) id pairs
+    def edges(self):
+        for source in range(len(self.urls)):
+            for k in range(self.out_offsets[source], self.out_offsets[source + 1]):
+                yield source, self.out_targets[k]
+
+    # Function to expand back into dependency (inbound) / reverse dependency (outbound) maps
+    def to_dependency_maps(self):
+        urls = self.urls
+        dependencies = {url: [urls[j] for j in self.predecessors(i)] for i, url in enumerate(urls)}
+        reverse_dependencies = {url: [urls[j] for j in self.successors(i)] for i, url in enumerate(urls)}
+        return dependencies, reverse_dependencies
+
+# Function to turn {url: links} into dependency / reverse dependency maps
+def link_maps(urls, links_by_url):
+    return LinkGraph.from_links(urls, links_by_url).to_dependency_maps()
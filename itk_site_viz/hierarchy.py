@@ -0,0 +1,72 @@
+# URL path trie of the sitemap pages
+from urllib.parse import urlsplit
+
+from .settings import BASE_URL
+
+# One node of the URL path trie. url is the sitemap URL for pages and the
+# canonical directory URL otherwise; page_count and inbound_links cover the
+# whole subtree including the node itself.
+class PathTrieNode:
+    __slots__ = ('segment', 'url', 'depth', 'children', 'is_page', 'page_count', 'inbound_links')
+
+    def __init__(self, segment, url, depth):
+        self.segment = segment
+        self.url = url
+        self.depth = depth
+        self.children = {}
+        self.is_page = False
+        self.page_count = 0
+        self.inbound_links = 0
+
+    # Function to look up the node for a path such as '/expertise/consulting/'
+    def find(self, path):
+        node = self
+        for part in path.strip('/').split('/'):
+            if part:
+                node = node.children.get(part)
+                if node is None:
+                    return None
+        return node
+
+    # Function to iterate the nodes of this subtree, parents before children
+    def walk(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(list(node.children.values())))
+
+    # Function to iterate the pages of this subtree, e.g. trie.find('/expertise').iter_pages()
+    def iter_pages(self):
+        return (node for node in self.walk() if node.is_page)
+
+    def __repr__(self):
+        return f"PathTrieNode({self.url!r}, pages={self.page_count}, inbound={self.inbound_links})"
+
+# Function to build hierarchy from URLs as a path trie. Subtree page counts and, when a
+# LinkGraph is given, inbound link totals are accumulated while inserting.
+def build_hierarchy(urls, graph=None, base_url=BASE_URL):
+    root = PathTrieNode('', base_url + '/', 0)
+    for url in urls:
+        path = url[len(base_url):] if url.startswith(base_url) else urlsplit(url).path
+        node = root
+        trail = [root]
+        for part in path.strip('/').split('/'):
+            if not part:
+                continue
+            child = node.children.get(part)
+            if child is None:
+                child = PathTrieNode(part, f"{node.url}{part}/", node.depth + 1)
+                node.children[part] = child
+            node = child
+            trail.append(node)
+        if node.is_page:
+            continue  # Listed twice in the sitemap
+        node.is_page = True
+        node.url = url
+        page = graph.ids.get(url) if graph is not None else None
+        inbound = graph.in_degree(page) if page is not None else 0
+        for ancestor in trail:
+            ancestor.page_count += 1
+            ancestor.inbound_links += inbound
+    return root
@@ -0,0 +1,107 @@
+# Streaming link extraction from page bodies
+from collections import namedtuple
+import codecs
+import re
+import time
+
+from lxml import etree
+
+# Which links count as page dependencies: the first <link_tag attr=...> inside each
+# <tag> carrying all of classes. Written as CSS like "p.link.link-arrow a[href]".
+LinkSelector = namedtuple('LinkSelector', ['tag', 'classes', 'link_tag', 'attr'])
+
+# Function to parse a CSS-like selector such as "p.link.link-arrow a[href]"
+def parse_link_selector(text):
+    match = re.fullmatch(r'\s*(\w+|\*)?((?:\.[\w-]+)*)\s+(\w+)\[([\w:-]+)\]\s*', text)
+    if not match:
+        raise ValueError(f"Unsupported link selector: {text!r}")
+    tag, classes, link_tag, attr = match.groups()
+    return LinkSelector(tag if tag and tag != '*' else None,
+                        frozenset(classes.split('.')[1:]), link_tag.lower(), attr)
+
+LINK_SELECTORS = (parse_link_selector('p.link.link-arrow a[href]'),)
+
+# lxml parser target that collects selected links from SAX-style events, so no
+# document tree is ever built
+class _LinkTarget:
+    def __init__(self, selectors):
+        self.selectors = selectors
+        self.links = []
+        self.stack = []  # (tag, container) for every open element
+        self.containers = []  # [selector, found] for open matching containers
+
+    def start(self, tag, attrib):
+        for container in self.containers:
+            selector, found = container
+            if not found and tag == selector.link_tag:
+                container[1] = True  # Only the first link inside each container counts
+                value = attrib.get(selector.attr)
+                if value:
+                    self.links.append(value)
+        container = None
+        class_attr = attrib.get('class')
+        if class_attr is not None:
+            classes = set(class_attr.split())
+            for selector in self.selectors:
+                if (selector.tag is None or selector.tag == tag) and selector.classes <= classes:
+                    container = [selector, False]
+                    self.containers.append(container)
+                    break
+        self.stack.append((tag, container))
+
+    def end(self, tag):
+        # Pop back to the matching start tag; stray end tags are ignored
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, container = self.stack.pop()
+            if container is not None:
+                self.containers.remove(container)
+            if open_tag == tag:
+                break
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self.links
+
+# Incremental link extractor: feed() body chunks as they arrive, close() returns the links
+class LinkExtractor:
+    def __init__(self, selectors=LINK_SELECTORS, encoding=None):
+        self.parser = etree.HTMLParser(target=_LinkTarget(selectors), encoding=encoding)
+        self.fed = False
+
+    def feed(self, chunk):
+        if chunk:
+            self.parser.feed(chunk)
+            self.fed = True
+
+    def close(self):
+        if not self.fed:
+            return []  # lxml refuses to close a parser that never saw any input
+        return self.parser.close()
+
+# Function to extract links from a complete HTML body (bytes or str)
+def extract_links(body, selectors=LINK_SELECTORS, encoding=None):
+    extractor = LinkExtractor(selectors, encoding)
+    extractor.feed(body)
+    return extractor.close()
+
+# Function to extract links in a parser process, also returning the seconds it took
+def _extract_links_timed(body, selectors=LINK_SELECTORS, encoding=None):
+    start = time.perf_counter()
+    links = extract_links(body, selectors, encoding)
+    return links, time.perf_counter() - start
+
+# Function to read the charset parameter of a Content-Type header; an unknown charset
+# gives None, so the parser detects the encoding itself instead of failing the page
+def content_charset(content_type):
+    match = re.search(r'charset=["\']?([\w.:-]+)', content_type, re.I)
+    if not match:
+        return None
+    try:
+        codecs.lookup(match.group(1))
+    except LookupError:
+        return None
+    return match.group(1)
@@ -0,0 +1,462 @@
+# Mesh view: offline graph layout, search index and the interactive page
+import json
+import logging
+import math
+import os
+
+import numpy as np
+
+from .analytics import NODE_PALETTE, node_groups, rank_sizes
+from .graph import GRAPH_TYPECODE
+from .settings import (BASE_URL, LAYOUT_CHUNK, LAYOUT_EXACT_LIMIT, LAYOUT_GRID, LAYOUT_ITERATIONS, LAYOUT_SCALE,
+                       MESH_FILE, SEARCH_DEBOUNCE_MS, SEARCH_MAX_RESULTS, SEARCH_TOKEN_SPLIT)
+
+log = logging.getLogger(__name__)
+
+# Function to place pages on a radial tree from the path trie: depth sets the radius and
+# each subtree gets an angular sector proportional to its page count
+def radial_layout(hierarchy, graph):
+    positions = np.zeros((len(graph), 2))
+    placed = np.zeros(len(graph), dtype=bool)
+    stack = [(hierarchy, 0.0, 2 * math.pi)]
+    while stack:
+        node, start, span = stack.pop()
+        page = graph.ids.get(node.url) if node.is_page else None
+        if page is not None:
+            angle = start + span / 2
+            positions[page] = (node.depth * math.cos(angle), node.depth * math.sin(angle))
+            placed[page] = True
+        total = sum(max(child.page_count, 1) for child in node.children.values())
+        for child in node.children.values():
+            width = span * max(child.page_count, 1) / total
+            stack.append((child, start, width))
+            start += width
+    # Pages outside the trie (other hosts) start on an outer ring
+    missing = np.flatnonzero(~placed)
+    if len(missing):
+        angles = np.linspace(0, 2 * math.pi, len(missing), endpoint=False)
+        radius = positions[placed].max() + 1 if placed.any() else 1
+        positions[missing] = radius * np.column_stack((np.cos(angles), np.sin(angles)))
+    return positions
+
+# Function to compute repulsion k^2 / d (k = 1) felt at each of `points` from `bodies`
+# of the given masses, a chunk of points at a time to bound memory
+def _repulsion(points, bodies, mass, softening):
+    force = np.zeros_like(points)
+    bodies_x, bodies_y = bodies[:, 0], bodies[:, 1]
+    # x and y as separate 2-D blocks: no (rows, bodies, 2) temporaries to allocate and reduce
+    for chunk in range(0, len(points), LAYOUT_CHUNK):
+        dx = points[chunk:chunk + LAYOUT_CHUNK, 0, None] - bodies_x
+        dy = points[chunk:chunk + LAYOUT_CHUNK, 1, None] - bodies_y
+        weight = mass / (dx * dx + dy * dy + softening)
+        force[chunk:chunk + LAYOUT_CHUNK, 0] = (dx * weight).sum(axis=1)
+        force[chunk:chunk + LAYOUT_CHUNK, 1] = (dy * weight).sum(axis=1)
+    return force
+
+# Function to compute a force-directed (Fruchterman-Reingold) layout with NumPy.
+# Repulsion is exact up to LAYOUT_EXACT_LIMIT pages. Beyond that pages are binned into
+# a grid: the far field is computed once per cell from the other cells' centroids
+# (O(cells^2)) and each page adds a push away from its own cell's centroid (O(n)).
+def force_layout(graph, initial=None, iterations=LAYOUT_ITERATIONS, seed=0):
+    n = len(graph)
+    if n == 0:
+        return np.zeros((0, 2))
+    rng = np.random.default_rng(seed)
+    positions = initial.astype(float).copy() if initial is not None else rng.standard_normal((n, 2))
+    # Spread the start over an area of roughly one unit per node, with a little jitter
+    # so pages sharing a spot can separate
+    positions -= positions.mean(axis=0)
+    spread = np.abs(positions).max() or 1.0
+    positions *= math.sqrt(n) / spread
+    positions += rng.uniform(-0.01, 0.01, positions.shape)
+
+    sources = np.repeat(np.arange(n), np.diff(np.frombuffer(graph.out_offsets, dtype=GRAPH_TYPECODE)))
+    targets = np.frombuffer(graph.out_targets, dtype=GRAPH_TYPECODE).astype(np.intp)
+    side = min(LAYOUT_GRID, math.ceil(math.sqrt(n / 4)))
+    temperature = math.sqrt(n) / 10
+
+    for step in range(iterations):
+        if n <= LAYOUT_EXACT_LIMIT:
+            displacement = _repulsion(positions, positions, np.ones(n), 1e-2)
+        else:
+            low = positions.min(axis=0)
+            size = (positions.max(axis=0) - low) / side + 1e-9
+            cell = np.minimum(((positions - low) / size).astype(np.intp), side - 1)
+            cell = cell[:, 0] * side + cell[:, 1]
+            occupied, cell = np.unique(cell, return_inverse=True)
+            mass = np.bincount(cell).astype(float)
+            centroids = np.column_stack([np.bincount(cell, weights=positions[:, axis]) for axis in (0, 1)])
+            centroids /= mass[:, None]
+            # A cell's own centroid contributes nothing to its far field (delta is zero)
+            far = _repulsion(centroids, centroids, mass, 1e-2)
+            softening = float((size ** 2).sum()) / 4
+            delta = positions - centroids[cell]
+            near = delta * ((mass[cell] - 1) / ((delta ** 2).sum(axis=1) + softening))[:, None]
+            displacement = far[cell] + near
+
+        # Attraction along links: d^2 / k
+        delta = positions[targets] - positions[sources]
+        pull = delta * np.sqrt((delta ** 2).sum(axis=1))[:, None]
+        for axis in (0, 1):
+            displacement[:, axis] += np.bincount(sources, weights=pull[:, axis], minlength=n)
+            displacement[:, axis] -= np.bincount(targets, weights=pull[:, axis], minlength=n)
+
+        # Move each page at most `temperature`, cooling linearly
+        length = np.sqrt((displacement ** 2).sum(axis=1)) + 1e-9
+        positions += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature = math.sqrt(n) / 10 * (1 - (step + 1) / iterations) + 1e-3
+    return positions
+
+# Function to lay the mesh graph out offline: the radial tree seeds a force-directed pass
+def layout_graph(graph, hierarchy=None, iterations=LAYOUT_ITERATIONS):
+    initial = radial_layout(hierarchy, graph) if hierarchy is not None else None
+    positions = force_layout(graph, initial, iterations)
+    if len(positions):
+        positions -= positions.mean(axis=0)
+        positions *= LAYOUT_SCALE  # Pixels per layout unit in the browser
+    return positions
+
+# Function to split a page path into lowercase search tokens. The same character class is
+# used by the page's JavaScript, so both sides tokenize identically.
+def search_tokens(text):
+    return [token for token in SEARCH_TOKEN_SPLIT.split(text.lower()) if token]
+
+# Function to build the mesh page search index: the sorted vocabulary of path tokens and,
+# per token, the delta-encoded ascending ids of the pages containing it. The page finds
+# the tokens starting with a query word by binary search and merges their postings, so a
+# lookup reads only the pages under the rarest word, stopping at SEARCH_MAX_RESULTS.
+def build_search_index(graph, base_url=BASE_URL):
+    postings = {}
+    for i, url in enumerate(graph.urls):
+        path = url[len(base_url):] if url.startswith(base_url) else url
+        for token in set(search_tokens(path)):
+            postings.setdefault(token, []).append(i)
+    vocabulary = sorted(postings)
+    encoded = []
+    for token in vocabulary:
+        ids = postings[token]  # Already ascending: pages are visited in id order
+        encoded.append([ids[0]] + [b - a for a, b in zip(ids, ids[1:])])
+    return {'tokens': vocabulary, 'postings': encoded}
+
+# Function to write the mesh graph data sidecar: compact JSON wrapped in a loadGraphData()
+# call, so the page can load it with a <script> tag even when opened from file://.
+# With analytics, node sizes follow PageRank and colors click depth.
+def write_mesh_data(out, graph, positions, base_url=BASE_URL, analytics=None):
+    data = {
+        'base': base_url,
+        'paths': [url[len(base_url):] if url.startswith(base_url) else url for url in graph.urls],
+        'x': np.rint(positions[:, 0]).astype(int).tolist() if len(graph) else [],
+        'y': np.rint(positions[:, 1]).astype(int).tolist() if len(graph) else [],
+        'edges': [value for edge in graph.edges() for value in edge],  # Flat [from, to, from, to, ...]
+        'search': build_search_index(graph, base_url),
+    }
+    if analytics is not None:
+        data['size'] = np.rint(rank_sizes(analytics.pagerank, 8, 40)).astype(int).tolist()
+        data['group'] = node_groups(analytics).tolist()
+        data['palette'] = list(NODE_PALETTE)
+        data['depth'] = analytics.depth.tolist()
+    out.write('loadGraphData(')
+    json.dump(data, out, separators=(',', ':'))
+    out.write(');\n')
+
+# Function to stream the mesh graph page to an open text file. The page is only a shell:
+# node positions and edges come from the data sidecar, loaded after the page renders.
+def write_mesh_html(out, data_src):
+    out.write('''<html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <title>Mesh Dependency Graph</title>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                text-align: center;
+            }
+            #graph {
+                width: 100%;
+                height: 800px;
+                margin: 20px 0;
+            }
+            #search-container {
+                margin: 20px;
+            }
+            #search-input {
+                padding: 8px;
+                width: 300px;
+                font-size: 16px;
+            }
+        </style>
+        <!-- Import Vis.js library for network visualization -->
+        <script type="text/javascript" src="https://cdnjs.cloudflare.com/ajax/libs/vis/4.21.0/vis.min.js"></script>
+        <link href="https://cdnjs.cloudflare.com/ajax/libs/vis/4.21.0/vis.min.css" rel="stylesheet" type="text/css" />
+    </head>
+    <body>
+        <h1>ITK Website page map Visual</h1>
+        
+        <div id="search-container">
+            <input type="text" id="search-input" placeholder="Search for ITK Page..." onkeyup="searchNode()" />
+        </div>
+        <div id="status">Loading graph...</div>
+        
+        <div id="graph"></div>
+
+        <script type="text/javascript">
+            var nodes = new vis.DataSet();
+            var edges = new vis.DataSet();
+            var network = null;
+
+            // Positions are computed offline, so the browser never runs physics
+            var options = {
+                nodes: {
+                    shape: 'dot',
+                    size: 15,
+                    font: {
+                        size: 12
+                    },
+                    borderWidth: 2
+                },
+                edges: {
+                    width: 2,
+                    arrows: {
+                        to: {enabled: true, scaleFactor: 1.2}
+                    },
+                    color: {color: "#6495ED"},  // Uniform color for links
+                    smooth: false
+                },
+                interaction: {
+                    hover: true,
+                    tooltipDelay: 200,
+                    hideEdgesOnDrag: true
+                },
+                layout: {
+                    improvedLayout: false
+                },
+                physics: {
+                    enabled: false
+                }
+            };
+
+            // Called by the data sidecar once it has loaded
+            function loadGraphData(data) {
+                var nodeList = new Array(data.paths.length);
+                for (var i = 0; i < data.paths.length; i++) {
+                    var path = data.paths[i];
+                    var url = /^https?:/.test(path) ? path : data.base + path;
+                    var node = {id: i + 1, label: path.replace(/\\//g, '_'), title: url, url: url,
+                                x: data.x[i], y: data.y[i]};
+                    if (data.size) {
+                        // Sized by PageRank, colored by click depth from the home page
+                        node.size = data.size[i];
+                        node.color = data.palette[data.group[i]];
+                        node.title = url + "<br>click depth: " + (data.depth[i] < 0 ? "unreachable" : data.depth[i]);
+                    }
+                    nodeList[i] = node;
+                }
+                var edgeList = new Array(data.edges.length / 2);
+                for (var k = 0; k < data.edges.length; k += 2) {
+                    edgeList[k / 2] = {from: data.edges[k] + 1, to: data.edges[k + 1] + 1};
+                }
+                nodes.add(nodeList);
+                edges.add(edgeList);
+                searchIndex = data.search;
+                searchPaths = data.paths;
+
+                var container = document.getElementById('graph');
+                network = new vis.Network(container, {nodes: nodes, edges: edges}, options);
+
+                // Add click event to nodes to navigate to the page
+                network.on("click", function (params) {
+                    if (params.nodes.length > 0) {
+                        var clickedNode = nodes.get(params.nodes[0]);
+                        if (clickedNode.url) {
+                            window.open(clickedNode.url, '_blank');
+                        }
+                    }
+                });
+                document.getElementById("status").textContent = "";
+            }
+
+            // Load the graph data lazily, after the page itself has rendered
+            window.addEventListener("load", function () {
+                var script = document.createElement("script");
+                script.src = "''' + data_src + '''";
+                document.body.appendChild(script);
+            });
+
+            // Search index from the data sidecar: sorted tokens, delta-encoded postings
+            var searchIndex = null;
+            var searchPaths = null;
+            var searchText = [];
+            var decodedPostings = [];
+            var searchTimer = null;
+            var TOKEN_SPLIT = /[^0-9a-z\\u00c0-\\u024f]+/;
+
+            function postingsAt(t) {
+                if (!decodedPostings[t]) {
+                    var deltas = searchIndex.postings[t];
+                    var ids = new Array(deltas.length);
+                    var id = 0;
+                    for (var k = 0; k < deltas.length; k++) {
+                        id += deltas[k];
+                        ids[k] = id;
+                    }
+                    decodedPostings[t] = ids;
+                }
+                return decodedPostings[t];
+            }
+
+            // First token >= word, by binary search over the sorted vocabulary
+            function lowerBound(tokens, word) {
+                var lo = 0, hi = tokens.length;
+                while (lo < hi) {
+                    var mid = (lo + hi) >> 1;
+                    if (tokens[mid] < word) {
+                        lo = mid + 1;
+                    } else {
+                        hi = mid;
+                    }
+                }
+                return lo;
+            }
+
+            // " token token ..." for one page, so other words can be checked with indexOf
+            function pageText(id) {
+                if (searchText[id] === undefined) {
+                    searchText[id] = " " + searchPaths[id].toLowerCase().split(TOKEN_SPLIT).join(" ");
+                }
+                return searchText[id];
+            }
+
+            // Min-heap of [id, list, position] cursors into sorted id lists, keyed by id
+            function heapPush(heap, item) {
+                var i = heap.length;
+                heap.push(item);
+                while (i > 0) {
+                    var parent = (i - 1) >> 1;
+                    if (heap[parent][0] <= item[0]) {
+                        break;
+                    }
+                    heap[i] = heap[parent];
+                    i = parent;
+                }
+                heap[i] = item;
+            }
+
+            function heapPop(heap) {
+                var top = heap[0];
+                var last = heap.pop();
+                if (heap.length) {
+                    var i = 0;
+                    while (true) {
+                        var child = 2 * i + 1;
+                        if (child >= heap.length) {
+                            break;
+                        }
+                        if (child + 1 < heap.length && heap[child + 1][0] < heap[child][0]) {
+                            child++;
+                        }
+                        if (heap[child][0] >= last[0]) {
+                            break;
+                        }
+                        heap[i] = heap[child];
+                        i = child;
+                    }
+                    heap[i] = last;
+                }
+                return top;
+            }
+
+            // Ids of pages with, for every query word, a path token starting with that word.
+            // Candidates come from the postings of the rarest word only, merged in id order.
+            function findNodes(query) {
+                var words = query.toLowerCase().split(TOKEN_SPLIT).filter(Boolean);
+                if (!words.length) {
+                    return [];
+                }
+                var tokens = searchIndex.tokens;
+                var ranges = words.map(function (word) {
+                    var lo = lowerBound(tokens, word);
+                    var hi = lowerBound(tokens, word + "\\uffff");
+                    var count = 0;
+                    for (var t = lo; t < hi; t++) {
+                        count += searchIndex.postings[t].length;
+                    }
+                    return {word: word, lo: lo, hi: hi, count: count};
+                });
+                ranges.sort(function (a, b) { return a.count - b.count; });
+                if (!ranges[0].count) {
+                    return [];
+                }
+
+                // k-way merge of the postings of every token the rarest word starts
+                var heap = [];
+                for (var t = ranges[0].lo; t < ranges[0].hi; t++) {
+                    var ids = postingsAt(t);
+                    heapPush(heap, [ids[0], ids, 0]);
+                }
+                var found = [];
+                var previous = -1;
+                while (heap.length && found.length < ''' + str(SEARCH_MAX_RESULTS) + ''') {
+                    var cursor = heapPop(heap);
+                    var id = cursor[0];
+                    if (cursor[2] + 1 < cursor[1].length) {
+                        heapPush(heap, [cursor[1][cursor[2] + 1], cursor[1], cursor[2] + 1]);
+                    }
+                    if (id === previous) {
+                        continue;  // The page has several tokens starting with the word
+                    }
+                    previous = id;
+                    var text = pageText(id);
+                    var matches = true;
+                    for (var w = 1; w < ranges.length && matches; w++) {
+                        matches = text.indexOf(" " + ranges[w].word) >= 0;
+                    }
+                    if (matches) {
+                        found.push(id);
+                    }
+                }
+                return found;
+            }
+
+            // Function to search for nodes by label, debounced while the user is typing
+            function searchNode() {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(runSearch, ''' + str(SEARCH_DEBOUNCE_MS) + ''');
+            }
+
+            function runSearch() {
+                if (!network) {
+                    return;
+                }
+                var input = document.getElementById("search-input").value;
+                var nodeIds = findNodes(input).map(function (id) { return id + 1; });
+
+                if (nodeIds.length > 0) {
+                    network.selectNodes(nodeIds);
+                    network.focus(nodeIds[0], {
+                        scale: 1.2,
+                        offset: {x: 0, y: 0},
+                        animation: {
+                            duration: 500,
+                            easingFunction: "easeInOutQuad"
+                        }
+                    });
+                } else {
+                    network.unselectAll();
+                }
+            }
+        </script>
+    </body>
+    </html>
+    ''')
+
+# Function to generate the mesh graph page plus its data sidecar (<name>.data.js)
+def generate_mesh_dependency_html_with_search(graph, path=MESH_FILE, hierarchy=None, base_url=BASE_URL,
+                                              analytics=None):
+    data_path = os.path.splitext(path)[0] + '.data.js'
+    positions = layout_graph(graph, hierarchy)
+    with open(data_path, 'w', encoding='utf-8') as file:
+        write_mesh_data(file, graph, positions, base_url, analytics)
+    with open(path, 'w', encoding='utf-8') as file:
+        write_mesh_html(file, os.path.basename(data_path))
+
+    log.info("Mesh graph HTML file with search generated: %s (data: %s)", path, data_path)
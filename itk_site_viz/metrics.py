@@ -0,0 +1,159 @@
+# Run instrumentation: stage timings, counters, gauges and their reports
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+from .settings import METRICS_PREFIX, METRICS_QUANTILES
+
+log = logging.getLogger(__name__)
+
+# Instrumentation for one run: wall time per stage, per-page fetch and parse durations,
+# counters (pages by status, bytes, non-HTML skips, errors, cache hits, throttled answers,
+# truncated bodies) and gauges (sizes of the sitemap and graph). With trace_memory each
+# stage also records its tracemalloc peak; with profile_path the stages run under
+# cProfile (calling thread only) and the stats are dumped there.
+# write_report() produces the JSON run report, write_prometheus() a text-format file.
+class RunMetrics:
+    def __init__(self, trace_memory=False, profile_path=None):
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.stages = {}
+        self.counters = Counter()  # (name, labels) -> value
+        self.gauges = {}
+        self.pages = []  # (url, status, size, fetch_seconds, parse_seconds)
+        self.trace_memory = trace_memory
+        self.profile_path = profile_path
+        self.profiler = cProfile.Profile() if profile_path else None
+        self.lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # Time a block of the run: with metrics.stage('crawl'): ...
+    @contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        if self.profiler is not None:
+            self.profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.profiler is not None:
+                self.profiler.disable()
+            self.stages[name] = {'seconds': round(elapsed, 6)}
+            if self.trace_memory:
+                self.stages[name]['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            log.info("Stage %s: %.2fs", name, elapsed)
+
+    def count(self, name, value=1, **labels):
+        with self.lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def set(self, name, value):
+        self.gauges[name] = value
+
+    # Record the outcome of one fetch
+    def record_fetch(self, result):
+        with self.lock:
+            self.pages.append((result.url, result.status, result.size, result.fetch_seconds, result.parse_seconds))
+        status = str(result.status) if result.status is not None else 'none'
+        self.count('pages_total', status=status)
+        self.count('bytes_total', result.size)
+        if result.throttled:
+            self.count('throttled_total', result.throttled)
+        if result.truncated:
+            self.count('truncated_total')
+        if result.error is not None:
+            self.count('fetch_errors_total', status=status)
+        elif result.status == 304:
+            self.count('cache_hits_total')
+        elif result.headers is not None and 'text/html' not in result.headers.get('Content-Type', ''):
+            self.count('non_html_skipped_total')
+
+    # Quantiles, mean and max of one per-page duration column
+    def _durations(self, column):
+        values = sorted(page[column] for page in self.pages)
+        if not values:
+            return {}
+        summary = {f'p{round(q * 100)}': values[min(len(values) - 1, int(q * len(values)))]
+                   for q in METRICS_QUANTILES}
+        summary.update(mean=sum(values) / len(values), max=values[-1], sum=sum(values), count=len(values))
+        return summary
+
+    # Stop tracing and profiling; the profile is written to profile_path
+    def finish(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.profile_path)
+            self.profiler = None
+
+    def report(self, include_pages=True):
+        counters = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            key = name + ''.join(f'{{{k}={v}}}' for k, v in labels)
+            counters[key] = value
+        report = {
+            'started_at': self.started_at,
+            'stages': self.stages,
+            'counters': counters,
+            'gauges': self.gauges,
+            'fetch_seconds': self._durations(3),
+            'parse_seconds': self._durations(4),
+        }
+        if include_pages:
+            report['pages'] = [{'url': url, 'status': status, 'bytes': size, 'fetch_seconds': round(fetch, 6),
+                                'parse_seconds': round(parse, 6)}
+                               for url, status, size, fetch, parse in self.pages]
+        return report
+
+    def write_report(self, path, include_pages=True):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(include_pages), file, indent=1)
+
+    # Prometheus text exposition format, e.g. for the node exporter's textfile collector
+    def write_prometheus(self, path):
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = f'{METRICS_PREFIX}_{name}'
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f'{metric}{{{label_text}}} {value}' if label_text else f'{metric} {value}')
+
+        for name, value in self.gauges.items():
+            lines.append(f'# TYPE {METRICS_PREFIX}_{name} gauge')
+            lines.append(f'{METRICS_PREFIX}_{name} {value}')
+        lines.append(f'# TYPE {METRICS_PREFIX}_stage_seconds gauge')
+        for name, stage in self.stages.items():
+            lines.append(f'{METRICS_PREFIX}_stage_seconds{{stage="{name}"}} {stage["seconds"]}')
+        if self.trace_memory:
+            lines.append(f'# TYPE {METRICS_PREFIX}_stage_peak_bytes gauge')
+            for name, stage in self.stages.items():
+                lines.append(f'{METRICS_PREFIX}_stage_peak_bytes{{stage="{name}"}} {stage["peak_bytes"]}')
+
+        for column, name in ((3, 'fetch_seconds'), (4, 'parse_seconds')):
+            summary = self._durations(column)
+            if not summary:
+                continue
+            metric = f'{METRICS_PREFIX}_page_{name}'
+            lines.append(f'# TYPE {metric} summary')
+            for q in METRICS_QUANTILES:
+                lines.append(f'{metric}{{quantile="{q}"}} {summary[f"p{round(q * 100)}"]}')
+            lines.append(f'{metric}_sum {summary["sum"]}')
+            lines.append(f'{metric}_count {summary["count"]}')
+
+        # Written next to the target and renamed so a scraper never reads half a file
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(path + '.tmp', path)
@@ -0,0 +1,134 @@
+# Whole runs: crawl the sitemap into a LinkGraph, then render every report from it
+import logging
+import os
+
+from .metrics import RunMetrics
+from .settings import (ANALYTICS_FILE, BASE_URL, CACHE_FILE, DEPENDENCY_FILE, DUPLICATES_FILE, HIERARCHY_FILE,
+                       MAX_RATE_PER_HOST, MESH_FILE, RESPECT_ROBOTS, RUN_REPORT_FILE, STATE_FILE, STORE_FILE)
+
+log = logging.getLogger(__name__)
+
+# Function to crawl the sitemap into a LinkGraph. The crawling modules (requests, lxml)
+# are imported here, not at the top, so rendering from the store never loads them.
+# cache_path and store_path may be None to crawl without a cache or crawl store.
+# respect_robots and max_rate (requests per second per host) configure the scheduler.
+# parse_workers > 0 parses the pages in that many processes (sitemap crawls only).
+def crawl_site(xml_file, incremental=False, frontier=False, dedup=False, cache_path=CACHE_FILE,
+               store_path=STORE_FILE, state_path=STATE_FILE, duplicates_path=DUPLICATES_FILE, metrics=None,
+               respect_robots=RESPECT_ROBOTS, max_rate=MAX_RATE_PER_HOST, parse_workers=0):
+    from .cache import ResponseCache
+    from .crawl import build_link_graph, build_link_graph_frontier, build_link_graph_incremental
+    from .dedup import DuplicateIndex
+    from .scheduler import CrawlScheduler
+    from .sitemap import parse_sitemap_entries
+    from .store import CrawlStore
+
+    metrics = metrics or RunMetrics()
+    with metrics.stage('sitemap'):
+        entries = parse_sitemap_entries(xml_file)  # Step 1: Parse XML
+    urls = [entry.loc for entry in entries]
+    metrics.set('sitemap_entries', len(entries))
+
+    # Build dependencies and reverse dependencies (existing logic)
+    cache = ResponseCache(cache_path) if cache_path else None
+    store = CrawlStore(store_path) if store_path else None  # Lets an interrupted crawl resume on the next run
+    duplicates = DuplicateIndex() if dedup else None  # Parse each distinct page once, merge copies
+    scheduler = CrawlScheduler(respect_robots=respect_robots, max_rate=max_rate)
+    with metrics.stage('crawl'):
+        if frontier:
+            if parse_workers:
+                log.warning("Frontier crawls parse on the fetcher threads, ignoring parse_workers")
+            graph = build_link_graph_frontier(entries, cache=cache, store=store, dedup=duplicates,
+                                              metrics=metrics, scheduler=scheduler)  # Also pages the sitemap misses
+        elif incremental:
+            graph = build_link_graph_incremental(entries, state_file=state_path, cache=cache, store=store,
+                                                 dedup=duplicates, metrics=metrics, scheduler=scheduler,
+                                                 parse_workers=parse_workers)
+        else:
+            graph = build_link_graph(urls, cache=cache, store=store, dedup=duplicates, metrics=metrics,
+                                     scheduler=scheduler, parse_workers=parse_workers)  # Step 2: Build dependencies
+    if cache is not None:
+        cache.save()
+        cache.report()
+    if store is not None:
+        store.close()
+    if duplicates is not None:
+        duplicates.save(duplicates_path)
+        duplicates.report()
+    return graph
+
+# Function to list the pages that failed in a crawl store run (default: the newest finished one)
+def failed_pages(store_path, run_id=None):
+    from .store import CrawlStore
+
+    if not store_path or not os.path.exists(store_path):
+        return []
+    store = CrawlStore(store_path)
+    try:
+        return [url for url, _, _ in store.failures(run_id)]
+    finally:
+        store.close()
+
+# Function to write the analytics, dependency, hierarchy and mesh reports of a LinkGraph
+# into output_dir. failed_urls are the pages the crawl could not fetch, for the broken
+# link report. shard_by ('prefix' or 'count') splits the dependency report into shards
+# behind an index page; by default it is a single file.
+def render_reports(graph, output_dir='.', base_url=BASE_URL, metrics=None, failed_urls=(), shard_by=None):
+    from .analytics import analyze_graph, write_analytics
+    from .hierarchy import build_hierarchy
+    from .mesh import generate_mesh_dependency_html_with_search
+    from .reports import generate_dependency_html, write_hierarchy_html
+
+    metrics = metrics or RunMetrics()
+    os.makedirs(output_dir, exist_ok=True)
+    with metrics.stage('analytics'):
+        analytics = analyze_graph(graph, failed_urls, base_url=base_url)  # PageRank, click depth, orphans, ...
+        summary = write_analytics(os.path.join(output_dir, ANALYTICS_FILE), graph, analytics)
+
+    with metrics.stage('hierarchy'):
+        url_hierarchy = build_hierarchy(graph.urls, graph, base_url)  # Step 3: Build hierarchy with inbound link totals
+
+    # Dependency report, optionally sharded so the browser can open it on large sites
+    with metrics.stage('dependency_report'):
+        dependency_files = generate_dependency_html(graph, os.path.join(output_dir, DEPENDENCY_FILE),
+                                                    shard_by=shard_by, base_url=base_url)
+
+    with metrics.stage('hierarchy_report'):
+        with open(os.path.join(output_dir, HIERARCHY_FILE), 'w', encoding='utf-8') as file:
+            write_hierarchy_html(file, url_hierarchy, graph, base_url, dependency_files=dependency_files,
+                                 analytics=analytics)  # Convert hierarchy to HTML
+
+    # Generate mesh dependency view
+    with metrics.stage('mesh_report'):
+        generate_mesh_dependency_html_with_search(graph, os.path.join(output_dir, MESH_FILE), url_hierarchy,
+                                                  base_url, analytics)  # Generate mesh dependency HTML
+
+    metrics.set('graph_pages', len(graph))
+    metrics.set('graph_links', graph.num_edges)
+    metrics.set('orphan_pages', len(summary['orphans']))
+    metrics.set('unreachable_pages', len(summary['click_depth']['unreachable']))
+    metrics.set('broken_links', len(summary['broken_links']))
+    log.info("HTML hierarchy and mesh dependency graphs generated in %s", output_dir)
+
+# Function to write the run report and Prometheus file of a finished run
+def write_run_reports(metrics, report_path=RUN_REPORT_FILE, prometheus_path=None):
+    metrics.finish()
+    if report_path:
+        metrics.write_report(report_path)
+    if prometheus_path:
+        metrics.write_prometheus(prometheus_path)
+
+# main function to generate both hierarchy and mesh graph
+def generate_html_graph(xml_file, incremental=False, frontier=False, dedup=False, report_path=RUN_REPORT_FILE,
+                        prometheus_path=None, profile_path=None, trace_memory=False, output_dir='.',
+                        base_url=BASE_URL, cache_path=CACHE_FILE, store_path=STORE_FILE, state_path=STATE_FILE,
+                        respect_robots=RESPECT_ROBOTS, max_rate=MAX_RATE_PER_HOST, parse_workers=0, shard_by=None):
+    metrics = RunMetrics(trace_memory=trace_memory, profile_path=profile_path)
+    os.makedirs(output_dir, exist_ok=True)
+    graph = crawl_site(xml_file, incremental, frontier, dedup, cache_path=cache_path, store_path=store_path,
+                       state_path=state_path, duplicates_path=os.path.join(output_dir, DUPLICATES_FILE),
+                       metrics=metrics, respect_robots=respect_robots, max_rate=max_rate,
+                       parse_workers=parse_workers)
+    render_reports(graph, output_dir, base_url, metrics, failed_pages(store_path), shard_by)
+    write_run_reports(metrics, report_path, prometheus_path)
+    return metrics
@@ -0,0 +1,275 @@
+# Dependency and hierarchy HTML reports
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import io
+import logging
+import os
+import re
+
+import numpy as np
+
+from .analytics import NODE_PALETTE, node_groups, rank_sizes
+from .settings import BASE_URL, DEPENDENCY_FILE, DEPENDENCY_SHARD_SIZE
+
+log = logging.getLogger(__name__)
+
+# Function to turn a page URL into its anchor id in the dependency report
+def dependency_anchor(url, base_url=BASE_URL):
+    return url.replace(base_url, '').replace('/', '_')
+
+# Function to stream the all-dependencies report to an open text file, one chunk per page.
+# ids restricts the report to those pages (one shard); by default every page is written.
+def write_dependency_html(out, graph, ids=None, heading='Page Dependencies', base_url=BASE_URL):
+    out.write('''<html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <title>All Dependencies</title>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+            }
+            .tree ul {
+                padding-top: 20px; 
+                position: relative;
+                transition: all 0.5s;
+                display: flex;
+                justify-content: center;
+            }
+            .tree li {
+                list-style-type: none;
+                margin: 0 20px;
+                text-align: center;
+                position: relative;
+                padding: 20px 5px 0 5px;
+            }
+            .tree li::before, .tree li::after {
+                content: '';
+                position: absolute;
+                top: 0;
+                right: 50%;
+                border-top: 2px solid #ccc;
+                width: 50%;
+                height: 20px;
+            }
+            .tree li::after {
+                right: auto; 
+                left: 50%;
+                border-left: 2px solid #ccc;
+            }
+            .tree li:only-child::after, .tree li:only-child::before {
+                display: none;
+            }
+            .tree li:only-child {
+                padding-top: 0;
+            }
+            .tree li:first-child::before, .tree li:last-child::after {
+                border: 0 none;
+            }
+            .tree li:last-child::before {
+                border-right: 2px solid #ccc;
+            }
+            .tree li:first-child::after {
+                border-left: 2px solid #ccc;
+            }
+            .tree ul ul::before {
+                content: '';
+                position: absolute;
+                top: 0;
+                left: 50%;
+                border-left: 2px solid #ccc;
+                width: 0;
+                height: 20px;
+            }
+            .tree li a {
+                border: 2px solid #ccc;
+                padding: 5px 10px;
+                text-decoration: none;
+                color: #666;
+                font-family: arial, verdana, tahoma;
+                font-size: 12px;
+                display: inline-block;
+                border-radius: 5px;
+                transition: all 0.5s;
+            }
+            .tree li a:hover, .tree li a:hover + ul li a {
+                background: #c8e4f8; 
+                color: #000;
+                border: 2px solid #94a0b4;
+            }
+        </style>
+    </head>
+    <body>
+        <h1>''' + heading + '''</h1>''')
+
+    urls = graph.urls
+    for i in (range(len(urls)) if ids is None else ids):
+        page = urls[i]
+        page_id = dependency_anchor(page, base_url)
+        chunk = [f'<h2 id="{page_id}">Page: <a href="{page}">{page}</a></h2>']
+
+        # Links to this page (Reverse Dependencies)
+        chunk.append('<div class="tree"><h3>Links to this page:</h3><ul>')
+        if graph.in_degree(i):
+            chunk.extend(f'<li><a href="{urls[j]}">{urls[j]}</a></li>' for j in graph.predecessors(i))
+        else:
+            chunk.append('<li>No pages link to this page.</li>')
+        chunk.append('</ul></div>')
+
+        # This page links to (Dependencies)
+        chunk.append('<div class="tree"><h3>This page links to:</h3><ul>')
+        if graph.out_degree(i):
+            chunk.extend(f'<li><a href="{urls[j]}">{urls[j]}</a></li>' for j in graph.successors(i))
+        else:
+            chunk.append('<li>No outbound links from this page.</li>')
+        chunk.append('</ul></div>')
+        out.write(''.join(chunk))
+
+    out.write('</body></html>')
+
+# Function to split the report into shards, returns [(shard name, [page ids])].
+# 'prefix' groups pages by site section (first path segment), 'count' cuts the sitemap order into runs;
+# either way no shard holds more than shard_size pages.
+def plan_dependency_shards(graph, shard_by='prefix', shard_size=DEPENDENCY_SHARD_SIZE, base_url=BASE_URL):
+    if shard_by == 'count':
+        groups = {'pages': list(range(len(graph)))}
+    elif shard_by == 'prefix':
+        segments = []
+        for url in graph.urls:
+            if url.startswith(base_url):
+                segment = url[len(base_url):].strip('/').split('/')[0] or 'home'
+            else:
+                segment = 'other'
+            segments.append(re.sub(r'[^0-9A-Za-z_-]+', '-', segment).strip('-') or 'other')
+        # Top-level pages without sub-pages (news posts, imprint, ...) share the home shard
+        sizes = Counter(segments)
+        groups = {}
+        for i, segment in enumerate(segments):
+            groups.setdefault(segment if sizes[segment] > 1 else 'home', []).append(i)
+    else:
+        raise ValueError(f"Unknown shard_by: {shard_by!r}")
+
+    shards = []
+    for name, ids in groups.items():
+        if len(ids) <= shard_size:
+            shards.append((name, ids))
+        else:
+            for part, start in enumerate(range(0, len(ids), shard_size), 1):
+                shards.append((f"{name}-{part}", ids[start:start + shard_size]))
+    return shards
+
+_shard_graph = None
+_shard_base_url = BASE_URL
+
+def _init_shard_worker(graph, base_url):
+    global _shard_graph, _shard_base_url
+    _shard_graph = graph
+    _shard_base_url = base_url
+
+def _write_dependency_shard(path, name, ids):
+    with open(path, 'w', encoding='utf-8') as file:
+        write_dependency_html(file, _shard_graph, ids, heading=f'Page Dependencies: {name}',
+                              base_url=_shard_base_url)
+    return path
+
+# Function to write the index page linking every shard
+def write_dependency_index(out, shards, files):
+    out.write('''<html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <title>All Dependencies</title>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+            }
+        </style>
+    </head>
+    <body>
+        <h1>Page Dependencies</h1>
+        <ul>
+''')
+    out.writelines(f'<li><a href="{file}">{name}</a> ({len(ids)} pages)</li>\n'
+                   for (name, ids), file in zip(shards, files))
+    out.write('        </ul>\n    </body>\n</html>\n')
+
+# Function to generate an HTML file for all dependencies with graphical structure.
+# With shard_by set, path becomes an index page and the pages are written to
+# <name>-<shard>.html files in parallel. Returns the report file of every page id,
+# for pointing anchor links at the right shard.
+def generate_dependency_html(graph, path=DEPENDENCY_FILE, shard_by=None, shard_size=DEPENDENCY_SHARD_SIZE,
+                             max_workers=None, base_url=BASE_URL):
+    if shard_by is None:
+        with open(path, 'w', encoding='utf-8') as file:
+            write_dependency_html(file, graph, base_url=base_url)
+        log.info("Graphical HTML file with all dependencies generated: %s", path)
+        return [os.path.basename(path)] * len(graph)
+
+    shards = plan_dependency_shards(graph, shard_by, shard_size, base_url)
+    stem, extension = os.path.splitext(path)
+    paths = [f"{stem}-{name}{extension}" for name, _ in shards]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_shard_worker,
+                             initargs=(graph, base_url)) as executor:
+        for future in [executor.submit(_write_dependency_shard, shard_path, name, ids)
+                       for shard_path, (name, ids) in zip(paths, shards)]:
+            future.result()
+
+    files = [os.path.basename(shard_path) for shard_path in paths]
+    with open(path, 'w', encoding='utf-8') as file:
+        write_dependency_index(file, shards, files)
+
+    files_by_id = [None] * len(graph)
+    for (_, ids), file in zip(shards, files):
+        for i in ids:
+            files_by_id[i] = file
+    log.info("Graphical HTML files with all dependencies generated: %s + %d shards", path, len(shards))
+    return files_by_id
+
+
+# Function to stream the hierarchy tree to an open text file. dependency_files gives the
+# report file holding each page id (see generate_dependency_html) when it is sharded.
+# With analytics (see analyze_graph), page borders are colored by click depth and get
+# thicker with PageRank.
+def write_hierarchy_html(out, hierarchy, graph, base_url=BASE_URL, dependency_files=None, analytics=None):
+    out.write('<div class="tree">\n')
+    counter = [0]  # To keep track of node numbering
+    if analytics is not None:
+        groups = node_groups(analytics).tolist()
+        widths = np.rint(rank_sizes(analytics.pagerank, 1, 8)).astype(int).tolist()
+    
+    def write_node(node, label, level, with_children=True):
+        counter[0] += 1
+        node_id = counter[0]
+        color = f"rgb({level * 50}, {255 - level * 50}, 100)"  # Gradient color
+        page = graph.ids.get(node.url)
+        has_dependencies = page is not None and graph.in_degree(page) > 0
+        page_filename = dependency_anchor(node.url, base_url)
+        report = dependency_files[page] if dependency_files and has_dependencies else DEPENDENCY_FILE
+        dependency_link = f'<a href="{report}#{page_filename}"> ➔</a>' if has_dependencies else ''
+        style = f"border-color: {color};"
+        title = f"{node.page_count} pages, {node.inbound_links} inbound links"
+        if analytics is not None and page is not None:
+            depth = analytics.depth[page]
+            style = f"border-color: {NODE_PALETTE[groups[page]]}; border-width: {widths[page]}px;"
+            title += (f", click depth {depth if depth >= 0 else 'unreachable'}, "
+                      f"PageRank {analytics.pagerank[page]:.2e}")
+            if analytics.failed[page]:
+                title += ", failed to load"
+        out.write(f'<div class="node" style="{style}" title="{title}">\n'
+                  f'  <a href="{node.url}">{node_id}: {label} {dependency_link}</a>\n')
+        if with_children and node.children:
+            out.write('  <div class="children">\n')
+            for child in node.children.values():
+                write_node(child, child.segment, level + 1)
+            out.write('  </div>\n')
+        out.write('</div>\n')
+
+    # The home page is the trie root; it is drawn as the first top-level node
+    if hierarchy.is_page:
+        write_node(hierarchy, "Home", 1, with_children=False)
+    for child in hierarchy.children.values():
+        write_node(child, child.segment, 1)
+    out.write('</div>\n')
+
+def hierarchy_to_html_graph(hierarchy, graph, base_url=BASE_URL, dependency_files=None, analytics=None):
+    out = io.StringIO()
+    write_hierarchy_html(out, hierarchy, graph, base_url, dependency_files, analytics)
+    return out.getvalue()
@@ -0,0 +1,287 @@
+# Crawl scheduling per host: robots.txt rules, a token bucket for the request rate and a
+# concurrency limit that adapts to the host's latency, errors and throttling
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+import logging
+import threading
+import time
+
+import requests
+
+from .fetch import FetchResult
+from .session import get_session
+from .settings import (BACKOFF_FACTOR, CONNECT_TIMEOUT, ERROR_RATE_LIMIT, INITIAL_PER_HOST, MAX_BACKOFF,
+                       MAX_PER_HOST, MAX_RATE_PER_HOST, MAX_RETRIES, READ_TIMEOUT, RESPECT_ROBOTS,
+                       SCHEDULER_SMOOTHING, SLOW_LATENCY_FACTOR, THROTTLE_STATUSES, USER_AGENT)
+
+log = logging.getLogger(__name__)
+
+# Token bucket: refills at rate tokens per second and holds at most burst
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    # Take a token if there is one and return 0, otherwise the seconds until there is one
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+# Function to read a Retry-After header (delay in seconds or an HTTP date) as seconds from now
+def retry_after(headers):
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+# robots.txt rules that also read fractional Crawl-delay values: RobotFileParser only
+# accepts whole seconds and silently drops "Crawl-delay: 0.5". The groups are matched to
+# a user agent the way RobotFileParser matches its entries.
+class RobotRules(RobotFileParser):
+    def __init__(self, url=''):
+        super().__init__(url)
+        self.delays = []
+
+    def parse(self, lines):
+        super().parse(lines)
+        self.delays = []
+        group = None
+        for line in lines:
+            field, _, value = line.split('#', 1)[0].partition(':')
+            field, value = field.strip().lower(), value.strip()
+            if not field:
+                if not line.strip():
+                    group = None
+            elif field == 'user-agent':
+                if group is None or group[2]:
+                    group = [[], None, False]  # Agents, delay, whether rules followed
+                    self.delays.append(group)
+                group[0].append(value.lower())
+            elif group is not None and field in ('allow', 'disallow', 'crawl-delay', 'request-rate'):
+                group[2] = True
+                if field == 'crawl-delay':
+                    try:
+                        group[1] = max(0.0, float(value))
+                    except ValueError:
+                        pass
+
+    def crawl_delay(self, useragent):
+        if not self.mtime():
+            return None
+        name = useragent.split('/')[0].lower()
+        default = []
+        for agents, delay, _ in self.delays:
+            for agent in agents:
+                if agent == '*':
+                    default.append(delay)
+                elif agent in name:
+                    return delay
+        return default[0] if default else None
+
+# Scheduling state of one host. limit is the adaptive concurrency window: it doubles every
+# round trip until the host first pushes back (slow start), then grows by one per limit
+# healthy responses. It shrinks by a quarter when responses turn slow or the server
+# errors pile up and halves on throttling, either only for requests sent after the last
+# decrease, so one burst of bad answers counts once.
+class HostState:
+    def __init__(self, max_concurrency, rate=None):
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(INITIAL_PER_HOST, max_concurrency))
+        self.active = 0
+        self.bucket = TokenBucket(rate) if rate else None
+        self.paused_until = 0.0
+        self.backoffs = 0  # Throttled answers in a row
+        self.latency = None
+        self.best_latency = None
+        self.error_rate = 0.0
+        self.last_decrease = 0.0
+        self.slow_start = True
+        self.robots = None
+        self.robots_lock = threading.Lock()
+        self.requests = self.throttled = self.blocked = 0
+        self.peak_limit = self.limit
+
+# Per-host crawl scheduler shared by the fetcher threads. run() checks robots.txt, waits
+# for a concurrency slot, a rate token and the end of any backoff pause, fetches, and
+# adapts the host's limit to how the response went. robots.txt is fetched once per host,
+# on its first page.
+class CrawlScheduler:
+    def __init__(self, session=None, max_per_host=MAX_PER_HOST, respect_robots=RESPECT_ROBOTS,
+                 max_rate=MAX_RATE_PER_HOST, user_agent=USER_AGENT, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self.session = session
+        self.max_per_host = max_per_host
+        self.respect_robots = respect_robots
+        self.max_rate = max_rate
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()  # Guards the slots of every host
+        self.closed = False
+
+    # Function to fetch and parse a host's robots.txt. Missing rules allow everything,
+    # 401/403 forbid everything; an unreachable robots.txt is logged and ignored.
+    def _load_robots(self, root):
+        url = root + '/robots.txt'
+        robots = RobotRules(url)
+        try:
+            response = (self.session or get_session()).get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            log.warning("Could not fetch %s, crawling without it: %s", url, e)
+            robots.allow_all = True
+            return robots
+        if response.status_code in (401, 403):
+            robots.disallow_all = True
+        elif response.status_code >= 400:
+            if response.status_code >= 500:
+                log.warning("Could not fetch %s, crawling without it: HTTP %d", url, response.status_code)
+            robots.allow_all = True
+        else:
+            robots.parse(response.text.splitlines())
+        return robots
+
+    # Function to get the state of url's host, loading its robots.txt on first use
+    def host(self, url):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        with self.lock:
+            state = self.hosts.get(key)
+            if state is None:
+                state = self.hosts[key] = HostState(self.max_per_host, self.max_rate)
+        if self.respect_robots and state.robots is None:
+            with state.robots_lock:
+                if state.robots is None:
+                    robots = self._load_robots(urlunsplit((parts.scheme, parts.netloc, '', '', '')))
+                    rates = [self.max_rate] if self.max_rate else []
+                    delay = robots.crawl_delay(self.user_agent)
+                    if delay:
+                        rates.append(1 / delay)
+                    request_rate = robots.request_rate(self.user_agent)
+                    if request_rate and request_rate.seconds:
+                        rates.append(request_rate.requests / request_rate.seconds)
+                    if rates and min(rates) != self.max_rate:
+                        state.bucket = TokenBucket(min(rates))
+                        log.info("Crawling %s at up to %.2f requests/sec (robots.txt)", parts.netloc, min(rates))
+                    state.robots = robots
+        return state
+
+    # Wait for a slot on host; False once the scheduler is closed
+    def acquire(self, host):
+        with self.condition:
+            while not self.closed:
+                now = time.monotonic()
+                delay = host.paused_until - now
+                if delay <= 0 and host.active < int(host.limit):
+                    delay = host.bucket.take(now) if host.bucket else 0.0
+                    if delay <= 0:
+                        host.active += 1
+                        return True
+                # Wake up at least once a second, so close() is noticed
+                self.condition.wait(min(delay, 1.0) if delay > 0 else 1.0)
+            return False
+
+    # Give the slot back and adapt the host's limit to the response
+    def release(self, host, result, elapsed):
+        with self.condition:
+            host.active -= 1
+            host.requests += 1
+            if result is not None:
+                self._adapt(host, result, elapsed, time.monotonic())
+            self.condition.notify_all()
+
+    def _adapt(self, host, result, elapsed, now):
+        if result.status in THROTTLE_STATUSES or result.throttled:
+            host.throttled += 1
+            # Answers to requests sent before the last decrease do not count again
+            if now - elapsed > host.last_decrease:
+                host.limit = max(1.0, host.limit / 2)
+                host.last_decrease = now
+                host.slow_start = False
+            if result.status in THROTTLE_STATUSES:
+                # Pause the whole host before run() tries again
+                host.backoffs += 1
+                pause = retry_after(result.headers)
+                if pause is None:
+                    pause = BACKOFF_FACTOR * 2 ** host.backoffs
+                pause = min(pause, MAX_BACKOFF)
+                host.paused_until = max(host.paused_until, now + pause)
+                log.warning("Throttled by %s (HTTP %d): pausing %.1fs, %d requests at a time",
+                            urlsplit(result.url).netloc, result.status, pause, int(host.limit))
+            return
+
+        host.backoffs = 0
+        server_error = result.error is not None and (result.status is None or result.status >= 500)
+        host.error_rate += SCHEDULER_SMOOTHING * (server_error - host.error_rate)
+        if not server_error:
+            if host.latency is None:
+                host.latency = host.best_latency = elapsed
+            else:
+                host.latency += SCHEDULER_SMOOTHING * (elapsed - host.latency)
+                # The baseline follows lasting slowdowns, slowly, so the limit does not sink for good
+                host.best_latency = min(host.latency, host.best_latency + SCHEDULER_SMOOTHING / 20 *
+                                        (host.latency - host.best_latency))
+        slow = host.latency is not None and host.latency > SLOW_LATENCY_FACTOR * host.best_latency
+        if slow or host.error_rate > ERROR_RATE_LIMIT:
+            if now - elapsed > host.last_decrease:
+                host.limit = max(1.0, host.limit * 0.75)
+                host.last_decrease = now
+                host.slow_start = False
+        elif not server_error and host.limit < host.max_concurrency:
+            host.limit = min(float(host.max_concurrency), host.limit + (1 if host.slow_start else 1 / host.limit))
+            host.peak_limit = max(host.peak_limit, host.limit)
+
+    # Function to fetch url with fetch(url) once robots.txt and the host's limits allow it.
+    # A throttling answer pauses the host and is retried up to MAX_RETRIES times; the
+    # crawl's session leaves those statuses to this loop. Disallowed pages are not
+    # requested: they come back without links or status, like a non-HTML page, so they
+    # are neither retried nor reported as broken.
+    def run(self, url, fetch):
+        host = self.host(url)
+        if self.respect_robots and not host.robots.can_fetch(self.user_agent, url):
+            with self.condition:
+                host.blocked += 1
+            log.info("Skipping %s: disallowed by robots.txt", url)
+            return FetchResult(url, [], None, None, None)
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.acquire(host):
+                return FetchResult(url, [], None, None, None, error='not fetched')
+            start = time.monotonic()
+            result = None
+            try:
+                result = fetch(url)
+            finally:
+                self.release(host, result, time.monotonic() - start)
+            if result.status not in THROTTLE_STATUSES:
+                break
+        return result._replace(throttled=result.throttled + attempt)
+
+    # Stop handing out slots, e.g. on Ctrl-C; waiting fetches give up
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    # Log what each host went through; with metrics also count the throttling and robots.txt blocks
+    def report(self, metrics=None):
+        if metrics is not None:
+            metrics.set('robots_blocked_pages', sum(host.blocked for host in self.hosts.values()))
+            metrics.set('throttled_responses', sum(host.throttled for host in self.hosts.values()))
+        for (_, netloc), host in self.hosts.items():
+            log.info("Host %s: %d requests, %d throttled, %d blocked by robots.txt, %d concurrent at most "
+                     "(%d at the end)", netloc, host.requests, host.throttled, host.blocked, int(host.peak_limit),
+                     int(host.limit))
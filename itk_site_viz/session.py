@@ -0,0 +1,47 @@
+# Pooled HTTP sessions
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .settings import (BACKOFF_FACTOR, MAX_BACKOFF, MAX_RETRIES, MAX_WORKERS, RETRY_STATUSES, THROTTLE_STATUSES,
+                       USER_AGENT)
+
+# Retry policy that waits for a Retry-After header at most MAX_BACKOFF seconds, so a
+# server asking for hours cannot park a worker thread
+class CappedRetry(Retry):
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return min(retry_after, MAX_BACKOFF) if retry_after is not None else None
+
+# Function to create a pooled keep-alive session with retry/backoff on retry_statuses
+def create_session(pool_size=MAX_WORKERS, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR,
+                   retry_statuses=RETRY_STATUSES):
+    retry = CappedRetry(
+        total=max_retries,
+        backoff_factor=backoff_factor,  # sleeps backoff_factor * 2 ** (retry - 1) between attempts
+        status_forcelist=retry_statuses,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        # 429/503 Retry-After wins over the backoff. urllib3 retries any answer carrying
+        # the header, so it is ignored when those statuses are not to be retried here.
+        respect_retry_after_header=any(status in retry_statuses for status in THROTTLE_STATUSES),
+        raise_on_status=False,  # hand the last response back so raise_for_status reports it
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT  # The agent robots.txt rules are matched against
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+_session = None
+_session_lock = threading.Lock()
+
+# Function to get the shared module-level session
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
@@ -0,0 +1,125 @@
+# Defaults shared by the crawler and the report writers
+import re
+
+# Crawl concurrency: total requests in flight, and requests in flight per host
+MAX_WORKERS = 16
+MAX_PER_HOST = 8
+
+# Fetched bodies allowed to wait for a parser process before fetchers block
+PARSE_QUEUE_SIZE = 64
+
+# HTTP session settings: timeouts in seconds, retries on throttling and server errors
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Crawl scheduler. Requests identify as USER_AGENT, which is also the robots.txt agent
+# matched. Per host, concurrency starts at INITIAL_PER_HOST and ramps up to max_per_host
+# while latency stays under SLOW_LATENCY_FACTOR x the best seen and the share of server
+# errors under ERROR_RATE_LIMIT; THROTTLE_STATUSES halve it and pause the host for the
+# Retry-After time or an exponential backoff, at most MAX_BACKOFF seconds. Request rates
+# come from robots.txt (Crawl-delay, Request-rate) and are capped at MAX_RATE_PER_HOST
+# requests per second when set. Latency and error rate are moving averages giving each
+# response SCHEDULER_SMOOTHING of the weight.
+USER_AGENT = 'itk-site-viz'
+RESPECT_ROBOTS = True
+INITIAL_PER_HOST = 2
+SLOW_LATENCY_FACTOR = 2.0
+ERROR_RATE_LIMIT = 0.1
+THROTTLE_STATUSES = (429, 503)
+# Sessions created for a crawl leave the throttling answers to the scheduler
+CRAWL_RETRY_STATUSES = tuple(status for status in RETRY_STATUSES if status not in THROTTLE_STATUSES)
+MAX_BACKOFF = 60.0
+MAX_RATE_PER_HOST = None
+SCHEDULER_SMOOTHING = 0.2
+
+# Site the sitemap describes; page paths are taken relative to it
+BASE_URL = 'https://www.itk-engineering.de'
+
+# Most pages written to one all_dependencies shard
+DEPENDENCY_SHARD_SIZE = 2000
+
+# Offline mesh layout: force-directed iterations, exact repulsion up to LAYOUT_EXACT_LIMIT
+# pages and at most a LAYOUT_GRID x LAYOUT_GRID cell approximation beyond,
+# LAYOUT_CHUNK rows of the interaction matrix at a time
+LAYOUT_ITERATIONS = 60
+LAYOUT_EXACT_LIMIT = 500
+LAYOUT_GRID = 40
+LAYOUT_CHUNK = 512
+LAYOUT_SCALE = 60
+
+# Mesh page search: path token separators (mirrored in the page's JavaScript), keystroke
+# debounce and the most pages a search selects
+SEARCH_TOKEN_SPLIT = re.compile('[^0-9a-z\u00c0-\u024f]+')
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_MAX_RESULTS = 500
+
+# On-disk conditional-GET cache reused between runs
+CACHE_FILE = '.crawl_cache.json'
+
+# Link graph from the previous run, used by the incremental recrawl
+STATE_FILE = '.crawl_state.json'
+
+# Report files, written to the output directory
+DEPENDENCY_FILE = 'all_dependencies.html'
+HIERARCHY_FILE = 'website_hierarchy_graph.html'
+MESH_FILE = 'itk-engineering-graph.html'
+DUPLICATES_FILE = 'duplicate_pages.json'
+ANALYTICS_FILE = 'graph_analytics.json'
+DIFF_FILE = 'crawl_diff.html'
+DIFF_REPORT_FILE = 'crawl_diff.json'
+
+# SQLite crawl store: every fetched page is committed as it completes so an interrupted
+# crawl resumes where it stopped; STORE_KEEP_RUNS finished crawls are kept
+STORE_FILE = '.crawl_store.sqlite'
+STORE_KEEP_RUNS = 5
+
+# Frontier crawl: link hops followed from the sitemap pages, the priority of sitemap pages
+# without <priority>, and the factor a discovered page's priority takes from its parent
+FRONTIER_MAX_DEPTH = 3
+DEFAULT_PRIORITY = 0.5
+PRIORITY_DECAY = 0.8
+
+# Duplicate pages: SimHash fingerprints within SIMHASH_DISTANCE bits count as near
+# duplicates; candidates are found through SIMHASH_BANDS exact-match bands (more bands
+# than the distance, so every near pair shares one), comparing against at most
+# SIMHASH_BUCKET_LIMIT earlier pages per band
+SIMHASH_DISTANCE = 3
+SIMHASH_BANDS = 4
+SIMHASH_BUCKET_LIMIT = 64
+
+# Seen-set Bloom filter: target false-positive rate when sized for an expected page count
+BLOOM_ERROR_RATE = 0.001
+
+# Body chunk size fed to the link extractor while the page downloads
+CHUNK_SIZE = 64 * 1024
+
+# Bodies are read up to MAX_BODY_SIZE bytes; longer pages keep the links found in that
+# part. URLs ending in HEAD_EXTENSIONS are probably not pages, so a HEAD request checks
+# their Content-Type before anything is downloaded.
+MAX_BODY_SIZE = 10 * 1024 * 1024
+HEAD_EXTENSIONS = ('.pdf', '.zip', '.gz', '.tar', '.7z', '.exe', '.dmg', '.iso', '.doc', '.docx', '.xls', '.xlsx',
+                   '.ppt', '.pptx', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.mp3', '.mp4', '.mov', '.avi',
+                   '.webm')
+
+# Machine-readable report of each run (stage timings, counters, per-page durations)
+RUN_REPORT_FILE = 'run_report.json'
+
+# Run instrumentation: metric name prefix in the Prometheus text file and the quantiles
+# reported for per-page fetch and parse durations
+METRICS_PREFIX = 'itk_site_viz'
+METRICS_QUANTILES = (0.5, 0.9, 0.99)
+
+# PageRank: damping factor, convergence tolerance (total change of the ranks in one
+# iteration) and iteration cap
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-6
+PAGERANK_MAX_ITERATIONS = 100
+
+# Report node colors: by click depth from the home page (deeper pages take the last
+# color), for pages the home page cannot reach, and for pages that failed to load
+DEPTH_COLORS = ('#1b5e20', '#43a047', '#9ccc65', '#fdd835', '#fb8c00', '#e64a19')
+UNREACHABLE_COLOR = '#9e9e9e'
+BROKEN_COLOR = '#d50000'
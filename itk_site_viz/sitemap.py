@@ -0,0 +1,117 @@
+# Sitemap reading: streams <url> entries from local or remote, plain or gzipped sitemaps
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+import gzip
+import io
+import os
+
+from .settings import CONNECT_TIMEOUT, READ_TIMEOUT
+
+# One <url> entry of the sitemap; lastmod and priority are None when absent
+SitemapEntry = namedtuple('SitemapEntry', ['loc', 'lastmod', 'priority'])
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+# Raw stream over a streamed response body; urllib3 reports itself closed as soon as
+# the body is exhausted, which would trip up io.BufferedReader
+class _ResponseStream(io.RawIOBase):
+    def __init__(self, response):
+        self.response = response
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.response.raw.read(len(buffer), decode_content=True)  # Undo Content-Encoding: gzip
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.response.close()
+        super().close()
+
+# GzipFile that also closes the stream it reads from: GzipFile(fileobj=...) leaves it
+# open, which leaks the file or streamed response of every .xml.gz sitemap
+class _GzipStream(gzip.GzipFile):
+    def close(self):
+        fileobj = self.fileobj
+        try:
+            super().close()
+        finally:
+            if fileobj is not None:
+                fileobj.close()
+
+# Function to open a sitemap file or URL as a binary stream, gunzipping .xml.gz transparently
+def open_sitemap(source, session=None):
+    if source.startswith(('http://', 'https://')):
+        from .session import get_session  # requests is only needed for remote sitemaps
+        response = (session or get_session()).get(source, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        response.raise_for_status()
+        stream = io.BufferedReader(_ResponseStream(response))
+    else:
+        stream = open(source, 'rb')
+    # Sniff the gzip magic rather than trusting the file name or Content-Type
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        return _GzipStream(fileobj=stream, mode='rb')
+    return stream
+
+# Function to stream SitemapEntry records, following <sitemapindex> children.
+# Elements are cleared as soon as they are read so memory stays flat.
+def iter_sitemap(source, session=None, _seen=None):
+    seen = _seen if _seen is not None else set()
+    if source in seen:
+        return
+    seen.add(source)
+
+    children = []
+    with open_sitemap(source, session) as stream:
+        context = ET.iterparse(stream, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event != 'end':
+                continue
+            if elem.tag == SITEMAP_NS + 'url':
+                loc = elem.findtext(SITEMAP_NS + 'loc')
+                if loc:
+                    lastmod = elem.findtext(SITEMAP_NS + 'lastmod')
+                    priority = elem.findtext(SITEMAP_NS + 'priority')
+                    try:
+                        priority = float(priority) if priority else None
+                    except ValueError:
+                        priority = None
+                    yield SitemapEntry(loc.strip(), lastmod.strip() if lastmod else None, priority)
+                root.clear()
+            elif elem.tag == SITEMAP_NS + 'sitemap':
+                loc = elem.findtext(SITEMAP_NS + 'loc')
+                if loc:
+                    children.append(loc.strip())
+                root.clear()
+
+    for child in children:
+        if not child.startswith(('http://', 'https://')) and not source.startswith(('http://', 'https://')):
+            child = os.path.join(os.path.dirname(source), child)  # Relative child of a local index
+        else:
+            child = urljoin(source, child)
+        yield from iter_sitemap(child, session, seen)
+
+# Function to parse the XML sitemap into SitemapEntry records
+def parse_sitemap_entries(xml_file):
+    return list(iter_sitemap(xml_file))
+
+# Function to parse the XML sitemap
+def parse_sitemap(xml_file):
+    return [entry.loc for entry in iter_sitemap(xml_file)]
+
+# Function to parse a sitemap <lastmod> (W3C datetime) as an aware UTC datetime
+def parse_lastmod(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
@@ -0,0 +1,196 @@
+# SQLite crawl store: resumable crawls and the link graphs of past runs
+from datetime import datetime, timezone
+import json
+import sqlite3
+
+from .graph import LinkGraph
+from .settings import STORE_FILE, STORE_KEEP_RUNS
+
+# SQLite record of crawls. Each run keeps its page list in sitemap order and one row
+# per page as it completes (status, fetch time, content hash, links), committed
+# immediately, so a crash or Ctrl-C loses nothing already fetched. Starting a crawl
+# while the last run is unfinished resumes that run; a finished run can be turned back
+# into a LinkGraph without touching the network. When a run finishes, each of its pages
+# gets its inbound link count, so two runs can be compared without rebuilding either
+# graph. Used from the crawling thread only.
+class CrawlStore:
+    def __init__(self, path=STORE_FILE, keep_runs=STORE_KEEP_RUNS):
+        self.path = path
+        self.keep_runs = keep_runs
+        self.run_id = None
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                started_at TEXT NOT NULL,
+                finished_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS run_urls (
+                run_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (run_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                run_id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                http_status INTEGER,
+                fetched_at TEXT NOT NULL,
+                content_hash TEXT,
+                links TEXT,
+                error TEXT,
+                inbound INTEGER,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS pages_by_url ON pages (url, run_id);
+        ''')
+        if 'inbound' not in {row[1] for row in self.db.execute('PRAGMA table_info(pages)')}:
+            self.db.execute('ALTER TABLE pages ADD COLUMN inbound INTEGER')  # Store from an older version
+        self.db.execute('CREATE INDEX IF NOT EXISTS pages_by_inbound ON pages (run_id, inbound)')
+        self.db.commit()
+
+    # Start a crawl of urls, or pick up the unfinished one; returns the run id
+    def begin_run(self, urls):
+        row = self.db.execute('SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1').fetchone()
+        with self.db:
+            if row:
+                self.run_id = row[0]
+            else:
+                self.run_id = self.db.execute('INSERT INTO runs (started_at) VALUES (?)',
+                                              (datetime.now(timezone.utc).isoformat(),)).lastrowid
+        self.set_urls(urls)
+        return self.run_id
+
+    # Replace the current run's page list, e.g. once a frontier crawl knows every page
+    def set_urls(self, urls):
+        with self.db:
+            self.db.execute('DELETE FROM run_urls WHERE run_id = ?', (self.run_id,))
+            self.db.executemany('INSERT INTO run_urls VALUES (?, ?, ?)',
+                                ((self.run_id, i, url) for i, url in enumerate(dict.fromkeys(urls))))
+
+    # {url: links} of the pages (among urls, if given) the current run already fetched successfully
+    def completed(self, urls=None):
+        wanted = set(urls) if urls is not None else None
+        rows = self.db.execute("SELECT url, links FROM pages WHERE run_id = ? AND status = 'ok'", (self.run_id,))
+        return {url: json.loads(links) for url, links in rows if wanted is None or url in wanted}
+
+    # Commit one page of the current run. A 304 carries no body, so its content hash
+    # is taken from the page's last stored fetch.
+    def record(self, result):
+        status = 'ok' if result.error is None else 'error'
+        links = json.dumps(result.links) if result.error is None else None
+        self._insert(result.url, status, result.status, result.content_hash, links, result.error)
+
+    # Commit a page whose links were carried over unchanged from an earlier crawl
+    def record_links(self, url, links):
+        self._insert(url, 'ok', None, None, json.dumps(links), None)
+
+    # Keep the links of an earlier crawl on a page of the current run that failed to
+    # refetch; the page stays an error, but the run's graph still has its links
+    def carry_links(self, url, links):
+        with self.db:
+            self.db.execute("UPDATE pages SET links = ? WHERE run_id = ? AND url = ? AND status = 'error'",
+                            (json.dumps(links), self.run_id, url))
+
+    def _insert(self, url, status, http_status, content_hash, links, error):
+        with self.db:
+            self.db.execute('''
+                INSERT OR REPLACE INTO pages (run_id, url, status, http_status, fetched_at, content_hash, links, error)
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, (
+                    SELECT content_hash FROM pages WHERE url = ? AND run_id < ? AND content_hash IS NOT NULL
+                    ORDER BY run_id DESC LIMIT 1)), ?, ?)
+            ''', (self.run_id, url, status, http_status, datetime.now(timezone.utc).isoformat(),
+                  content_hash, url, self.run_id, links, error))
+
+    # Mark the current run complete and drop runs beyond keep_runs
+    def finish_run(self):
+        self.count_inbound(self.run_id)
+        with self.db:
+            self.db.execute('UPDATE runs SET finished_at = ? WHERE id = ?',
+                            (datetime.now(timezone.utc).isoformat(), self.run_id))
+            old = [row[0] for row in self.db.execute(
+                'SELECT id FROM runs WHERE finished_at IS NOT NULL ORDER BY id DESC LIMIT -1 OFFSET ?',
+                (self.keep_runs,))]
+            for table, column in (('pages', 'run_id'), ('run_urls', 'run_id'), ('runs', 'id')):
+                self.db.executemany(f'DELETE FROM {table} WHERE {column} = ?', ((run_id,) for run_id in old))
+        self.run_id = None
+
+    # Id of the newest finished run, or None
+    def last_run(self):
+        row = self.db.execute('SELECT MAX(id) FROM runs WHERE finished_at IS NOT NULL').fetchone()
+        return row[0]
+
+    # Page list in sitemap order and {url: links} of a run (default: the newest finished
+    # one); pages that failed are missing from the dict unless they carry earlier links
+    def load_links(self, run_id=None):
+        run_id = run_id if run_id is not None else self.last_run()
+        urls = [row[0] for row in self.db.execute(
+            'SELECT url FROM run_urls WHERE run_id = ? ORDER BY position', (run_id,))]
+        rows = self.db.execute('SELECT url, links FROM pages WHERE run_id = ? AND links IS NOT NULL', (run_id,))
+        return urls, {url: json.loads(links) for url, links in rows}
+
+    # Rebuild a run's LinkGraph from the store alone
+    def link_graph(self, run_id=None):
+        return LinkGraph.from_links(*self.load_links(run_id))
+
+    # Store the inbound link count of every page of a run, as its LinkGraph counts them.
+    # Pages left over from an earlier page list of a resumed run keep NULL.
+    def count_inbound(self, run_id):
+        graph = self.link_graph(run_id)
+        with self.db:
+            self.db.executemany('UPDATE pages SET inbound = ? WHERE run_id = ? AND url = ?',
+                                ((graph.in_degree(i), run_id, url) for i, url in enumerate(graph.urls)))
+
+    # Count inbound links for runs stored before the counts were kept
+    def _ensure_inbound(self, *run_ids):
+        for run_id in run_ids:
+            if not self.db.execute('SELECT 1 FROM pages WHERE run_id = ? AND inbound IS NOT NULL LIMIT 1',
+                                   (run_id,)).fetchone():
+                self.count_inbound(run_id)
+
+    # Id of the newest finished run before run_id, or None
+    def previous_run(self, run_id):
+        row = self.db.execute('SELECT MAX(id) FROM runs WHERE finished_at IS NOT NULL AND id < ?',
+                              (run_id,)).fetchone()
+        return row[0]
+
+    # (id, started at, finished at) of every run, oldest first
+    def runs(self):
+        return self.db.execute('SELECT id, started_at, finished_at FROM runs ORDER BY id').fetchall()
+
+    # Pages that differ between two finished runs, as (url, old status, old links JSON,
+    # new status, new links JSON) rows; a page missing from one run has None there. The
+    # comparison runs inside SQLite, so only the changed pages reach Python.
+    def changed_pages(self, old_run, new_run):
+        self._ensure_inbound(old_run, new_run)
+        # inbound is set exactly for the pages in a run's page list
+        return self.db.execute('''
+            SELECT n.url, o.status, o.links, n.status, n.links
+            FROM pages n LEFT JOIN pages o ON o.run_id = :old AND o.url = n.url AND o.inbound IS NOT NULL
+            WHERE n.run_id = :new AND n.inbound IS NOT NULL
+              AND (o.url IS NULL OR o.status IS NOT n.status OR o.links IS NOT n.links)
+            UNION ALL
+            SELECT o.url, o.status, o.links, NULL, NULL
+            FROM pages o LEFT JOIN pages n ON n.run_id = :new AND n.url = o.url AND n.inbound IS NOT NULL
+            WHERE o.run_id = :old AND o.inbound IS NOT NULL AND n.url IS NULL
+        ''', {'old': old_run, 'new': new_run}).fetchall()
+
+    # Pages of both runs that had inbound links in old_run and have none in new_run
+    def newly_orphaned(self, old_run, new_run):
+        self._ensure_inbound(old_run, new_run)
+        return [row[0] for row in self.db.execute('''
+            SELECT n.url FROM pages n JOIN pages o ON o.run_id = ? AND o.url = n.url
+            WHERE n.run_id = ? AND n.inbound = 0 AND o.inbound > 0 ORDER BY n.url
+        ''', (old_run, new_run))]
+
+    # (url, http status, error) of every page that failed in a run
+    def failures(self, run_id=None):
+        run_id = run_id if run_id is not None else self.last_run()
+        return self.db.execute("SELECT url, http_status, error FROM pages WHERE run_id = ? AND status = 'error' "
+                               "ORDER BY url", (run_id,)).fetchall()
+
+    def close(self):
+        self.db.close()
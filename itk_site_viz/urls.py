@@ -0,0 +1,44 @@
+# URL resolution and normalization
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+
+# Function to turn the hrefs found on page url into absolute http(s) URLs without
+# fragments; in-page anchors and other schemes (mailto:, tel:, javascript:) are dropped
+def resolve_links(url, links):
+    resolved = []
+    for href in links:
+        href = href.strip()
+        if not href or href.startswith('#'):
+            continue
+        link = urldefrag(urljoin(url, href))[0]
+        if link.startswith(('http://', 'https://')):
+            resolved.append(link)
+    return resolved
+
+# Function to reduce a URL to the form the frontier crawl identifies pages by: lowercase
+# scheme and host, no default port, no query or fragment, no trailing slash (except
+# the root) and no empty path segments
+def canonical_url(url):
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{parts.port}'
+    path = '/' + '/'.join(segment for segment in parts.path.split('/') if segment)
+    return urlunsplit((scheme, host, path, '', ''))
+
+# Function to tell whether a site writes its page URLs with a trailing slash: true when
+# most of urls (the root and file names aside) end in one
+def uses_trailing_slash(urls):
+    paths = [urlsplit(url).path for url in urls]
+    paths = [path for path in paths if path.strip('/') and '.' not in path.rstrip('/').rsplit('/', 1)[-1]]
+    return 2 * sum(path.endswith('/') for path in paths) > len(paths)
+
+# Function to give the URL a page reached by a link is fetched and stored as: its
+# canonical_url, with a trailing slash added for a site that uses them (file names
+# excepted). It depends only on the link, not on which variant was found first.
+def page_url(url, trailing_slash=False):
+    url = canonical_url(url)
+    path = urlsplit(url).path
+    if trailing_slash and path != '/' and '.' not in path.rsplit('/', 1)[-1]:
+        url += '/'
+    return url